@@ -0,0 +1,153 @@
+"""Микробенчмарки основных операций календаря.
+
+Строит синтетические календари заданных размеров и плотности и замеряет
+`add_meeting`, `get_conflicting_meetings`, `find_next_free_slot`,
+`remove_meeting` и `get_state_string`. Результаты выводятся в JSON,
+чтобы их можно было сравнивать между версиями.
+
+Запуск из корня репозитория:
+    python -m benchmarks.calendar_bench --sizes 1000 10000 100000 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from tools.calendar_tools import Calendar
+
+SLOT = timedelta(minutes=30)
+
+
+def build_calendar(n_meetings: int, density: float, seed: int = 0) -> Tuple[Calendar, List[datetime]]:
+    """Строит календарь, в котором рабочее время занято 30-минутными встречами с долей `density`.
+
+    Args:
+        n_meetings: Количество встреч.
+        density: Доля занятых 30-минутных ячеек рабочего времени (0..1].
+        seed: Зерно генератора случайных чисел.
+
+    Returns:
+        Календарь и список свободных ячеек рабочего времени между встречами.
+    """
+    rng = random.Random(seed)
+    calendar = Calendar()
+    rows, free_slots = [], []
+    day = datetime(2025, 1, 6)
+    while len(rows) < n_meetings:
+        if day.weekday() in calendar.working_days:
+            slot = day.replace(hour=calendar.work_start_hour)
+            end_of_day = day.replace(hour=calendar.work_end_hour)
+            while slot < end_of_day and len(rows) < n_meetings:
+                if rng.random() < density:
+                    rows.append(("Синтетическая встреча", "bench@example.com", 30, slot))
+                else:
+                    free_slots.append(slot)
+                slot += SLOT
+        day += timedelta(days=1)
+    calendar.add_meetings_bulk(rows)
+    return calendar, free_slots
+
+
+def _time_calls(func: Callable[[Any], Any], args: List[Any]) -> Dict[str, float]:
+    """Вызывает func для каждого аргумента и возвращает статистику времени одного вызова в микросекундах."""
+    timings = []
+    for arg in args:
+        t0 = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - t0) * 1e6)
+    return {
+        "runs": len(timings),
+        "mean_us": statistics.fmean(timings),
+        "median_us": statistics.median(timings),
+        "min_us": min(timings),
+        "max_us": max(timings),
+    }
+
+
+def bench_size(size: int, density: float, queries: int, seed: int) -> List[Dict[str, Any]]:
+    """Замеряет все операции на одном синтетическом календаре."""
+    t0 = time.perf_counter()
+    calendar, free_slots = build_calendar(size, density, seed)
+    build_seconds = time.perf_counter() - t0
+
+    rng = random.Random(seed + size)
+    meetings = calendar.meetings
+    span_start, span_end = meetings[0].start_time, meetings[-1].end_time
+    span_minutes = int((span_end - span_start) / timedelta(minutes=1))
+    probes = [span_start + timedelta(minutes=rng.randrange(span_minutes)) for _ in range(queries)]
+    free_probes = rng.sample(free_slots, min(queries, len(free_slots)))
+    removed_ids = [m.id for m in rng.sample(meetings, min(queries, len(meetings)))]
+
+    results = {}
+    # Первая отрисовка форматирует все встречи; после изменения — только новые,
+    # а повторные вызовы без изменений берутся из кэша.
+    results["get_state_string_cold"] = _time_calls(lambda _: calendar.get_state_string(), range(1))
+    results["get_conflicting_meetings"] = _time_calls(
+        lambda start: calendar.get_conflicting_meetings(start, timedelta(minutes=60)), probes
+    )
+    results["find_next_free_slot"] = _time_calls(
+        lambda start: calendar.find_next_free_slot(start, timedelta(minutes=60)), probes
+    )
+    results["add_meeting"] = _time_calls(
+        lambda start: calendar.add_meeting("Новая встреча", "bench@example.com", 30, start), free_probes
+    )
+    results["get_state_string_after_change"] = _time_calls(lambda _: calendar.get_state_string(), range(1))
+    results["get_state_string_cached"] = _time_calls(lambda _: calendar.get_state_string(), range(queries))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["remove_meeting"] = _time_calls(calendar.remove_meeting, removed_ids)
+
+    return [
+        {"size": size, "density": density, "operation": name, "build_seconds": build_seconds, **stats}
+        for name, stats in results.items()
+    ]
+
+
+def _git_revision() -> str:
+    """Возвращает текущий коммит репозитория (или пустую строку)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(sizes: List[int], density: float, queries: int, seed: int) -> Dict[str, Any]:
+    """Прогоняет бенчмарки для всех размеров и возвращает отчёт."""
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "density": density,
+            "queries": queries,
+            "seed": seed,
+        },
+        "results": [row for size in sizes for row in bench_size(size, density, queries, seed)],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--density", type=float, default=0.8, help="Доля занятого рабочего времени.")
+    parser.add_argument("--queries", type=int, default=200, help="Количество вызовов каждой операции.")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора случайных чисел.")
+    parser.add_argument("--output", help="Файл для JSON-отчёта (по умолчанию — стандартный вывод).")
+    args = parser.parse_args()
+    report = run(args.sizes, args.density, args.queries, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
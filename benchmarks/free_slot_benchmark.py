@@ -0,0 +1,108 @@
+"""Регрессионный бенчмарк поиска свободного слота в календаре.
+
+Сравнивает текущий `Calendar.find_next_free_slot` (один проход вперёд)
+с прежним квадратичным алгоритмом на синтетических плотных календарях.
+
+Запуск из корня репозитория:
+    python -m benchmarks.free_slot_benchmark --sizes 500 2000 5000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from tools.calendar_tools import Calendar
+
+
+def legacy_find_next_free_slot(calendar: Calendar, start_time: datetime, duration: timedelta) -> datetime:
+    """Прежняя реализация поиска: пересортировка и повторный скан после каждой коллизии."""
+    current_time = start_time
+
+    if not calendar.is_working_time(current_time):
+        current_time = calendar._next_working_time(current_time)
+
+    sorted_meetings = sorted(calendar.meetings, key=lambda m: m.start_time)
+    if not sorted_meetings:
+        if current_time.hour < calendar.work_start_hour:
+            current_time = current_time.replace(hour=calendar.work_start_hour, minute=0, second=0, microsecond=0)
+        return current_time
+
+    while True:
+        is_free = True
+        potential_end_time = current_time + duration
+        for meeting in sorted_meetings:
+            if current_time < meeting.end_time and meeting.start_time < potential_end_time:
+                is_free = False
+                current_time = meeting.end_time
+                if not calendar.is_working_time(current_time):
+                    current_time = calendar._next_working_time(current_time)
+                break
+
+        if is_free:
+            end_of_workday = datetime(current_time.year, current_time.month, current_time.day, calendar.work_end_hour, 0, 0)
+            if potential_end_time <= end_of_workday:
+                return current_time
+            else:
+                current_time = calendar._next_working_time(current_time.replace(hour=calendar.work_end_hour))
+
+
+def build_dense_calendar(n_meetings: int, fill: float, seed: int = 0) -> Tuple[Calendar, datetime]:
+    """Строит календарь, в котором рабочие часы заняты встречами с долей `fill`.
+
+    Args:
+        n_meetings: Количество встреч.
+        fill: Доля занятых 30-минутных ячеек рабочего времени (0..1].
+        seed: Зерно генератора случайных чисел.
+
+    Returns:
+        Календарь и момент начала первой встречи.
+    """
+    rng = random.Random(seed)
+    calendar = Calendar()
+    start = datetime(2025, 1, 6, calendar.work_start_hour)
+    day = start
+    added = 0
+    while added < n_meetings:
+        if day.weekday() in calendar.working_days:
+            slot = day
+            end_of_day = day.replace(hour=calendar.work_end_hour)
+            while slot < end_of_day and added < n_meetings:
+                if rng.random() < fill:
+                    calendar.add_meeting("Синтетическая встреча", "bench@example.com", 30, slot)
+                    added += 1
+                slot += timedelta(minutes=30)
+        day += timedelta(days=1)
+    return calendar, start
+
+
+def run(sizes: List[int], fill: float, queries: int, duration_minutes: int) -> None:
+    """Прогоняет оба алгоритма и печатает время и расхождения результатов."""
+    duration = timedelta(minutes=duration_minutes)
+    print(f"{'встреч':>8} {'прежний, с':>12} {'текущий, с':>12} {'ускорение':>10} {'расхождений':>12}")
+    for size in sizes:
+        calendar, start = build_dense_calendar(size, fill)
+        last = calendar.meetings[-1].start_time
+        rng = random.Random(size)
+        span = int((last - start).total_seconds() // 60)
+        probes = [start + timedelta(minutes=rng.randrange(span)) for _ in range(queries)]
+
+        t0 = time.perf_counter()
+        legacy = [legacy_find_next_free_slot(calendar, p, duration) for p in probes]
+        t1 = time.perf_counter()
+        current = [calendar.find_next_free_slot(p, duration) for p in probes]
+        t2 = time.perf_counter()
+
+        mismatches = sum(a != b for a, b in zip(legacy, current))
+        speedup = (t1 - t0) / (t2 - t1) if t2 > t1 else float("inf")
+        print(f"{size:>8} {t1 - t0:>12.4f} {t2 - t1:>12.4f} {speedup:>10.1f} {mismatches:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--fill", type=float, default=0.9, help="Доля занятого рабочего времени.")
+    parser.add_argument("--queries", type=int, default=50, help="Количество запросов на размер.")
+    parser.add_argument("--duration", type=int, default=60, help="Длительность искомого слота в минутах.")
+    args = parser.parse_args()
+    run(args.sizes, args.fill, args.queries, args.duration)
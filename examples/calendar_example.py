@@ -19,5 +19,4 @@ meetings_to_add = [
 ]
 
 
-for topic, organizer, duration, start_dt, prio in meetings_to_add:
-    CALENDAR_EXAMPLE.add_meeting(topic, organizer, duration, start_dt, prio)    
\ No newline at end of file
+CALENDAR_EXAMPLE.add_meetings_bulk(meetings_to_add)    
\ No newline at end of file
@@ -0,0 +1,41 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from tools.calendar_storage import SQLiteMeetingStore
+from tools.calendar_tools import Calendar, Priority
+
+
+def test_displacement_survives_reopen(tmp_path):
+    """Перенесённые встречи сохраняют ID и не сбрасывают next_id в хранилище."""
+    path = tmp_path / "calendar.db"
+    calendar = Calendar.open(str(path))
+    calendar.add_meeting("Первая", "a@example.com", 60, datetime(2025, 3, 3, 10))
+    calendar.add_meeting("Вторая", "a@example.com", 60, datetime(2025, 3, 3, 12))
+    moved = calendar.add_meeting_displacing("Срочная", "b@example.com", 60, datetime(2025, 3, 3, 10), Priority.HIGH)
+    assert [old.id for old, _ in moved] == [1]
+
+    reopened = Calendar.open(str(path))
+    assert reopened.next_id == 4
+    reopened.add_meeting("Новая", "a@example.com", 30, datetime(2025, 3, 4, 10))
+    assert sorted(m.id for m in reopened.meetings) == [1, 2, 3, 4]
+
+
+def test_failed_displacement_keeps_stored_meetings(tmp_path, monkeypatch):
+    """Сбой при записи перенесённых встреч не удаляет вытесненные встречи из файла."""
+    path = tmp_path / "calendar.db"
+    calendar = Calendar.open(str(path))
+    calendar.add_meeting("Первая", "a@example.com", 60, datetime(2025, 3, 3, 10))
+
+    def fail(self, meetings):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(SQLiteMeetingStore, "_insert", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        calendar.add_meeting_displacing("Срочная", "b@example.com", 60, datetime(2025, 3, 3, 10), Priority.HIGH)
+    monkeypatch.undo()
+
+    reopened = Calendar.open(str(path))
+    assert [(m.id, m.topic) for m in reopened.meetings] == [(1, "Первая")]
+    assert reopened.next_id == 2
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools.calendar_tools import (
+    Calendar, CalendarGroup, FindCommonFreeSlotsTool, FindFreeSlotTool, Frequency, Priority, Recurrence
+)
+
+
+def _fully_booked_calendar() -> Calendar:
+    """Календарь, в котором серия по будням занимает весь рабочий день 9–18."""
+    calendar = Calendar()
+    calendar.add_recurring_meeting(
+        "Дежурство", "a@example.com", 540, datetime(2025, 3, 3, 9), Recurrence(Frequency.WEEKLY, weekdays=[0, 1, 2, 3, 4])
+    )
+    return calendar
+
+
+def test_free_slot_search_stops_when_series_fill_working_days():
+    calendar = Calendar()
+    calendar.add_recurring_meeting("Дежурство", "a@example.com", 540, datetime(2025, 3, 3, 9), Recurrence(Frequency.DAILY))
+    with pytest.raises(ValueError):
+        calendar.find_next_free_slot(datetime(2025, 3, 3, 9), timedelta(minutes=30))
+
+    result = FindFreeSlotTool(calendar).forward(30, "2025-03-03")
+    assert result["success"] is False
+
+
+def test_displacement_is_rolled_back_when_there_is_no_room():
+    calendar = _fully_booked_calendar()
+    calendar.add_meeting("Субботняя", "a@example.com", 60, datetime(2025, 3, 8, 10))
+    with pytest.raises(ValueError):
+        calendar.add_meeting_displacing("Срочная", "b@example.com", 60, datetime(2025, 3, 8, 10), Priority.HIGH)
+    assert [(m.id, m.topic) for m in calendar.meetings] == [(2, "Субботняя")]
+    assert calendar.next_id == 3
+
+
+def test_free_slot_search_looks_past_one_off_meetings():
+    calendar = Calendar()
+    calendar.add_recurring_meeting(
+        "Планёрка", "a@example.com", 540, datetime(2025, 3, 3, 9), Recurrence(Frequency.WEEKLY, weekdays=[0, 1, 2, 3])
+    )
+    fridays = [datetime(2025, 3, 7, 9) + timedelta(weeks=n) for n in range(10)]
+    for friday in fridays:
+        calendar.add_meeting("Отчёт", "a@example.com", 540, friday)
+    slot = calendar.find_next_free_slot(datetime(2025, 3, 3, 9), timedelta(minutes=30))
+    assert slot == fridays[-1] + timedelta(weeks=1)
+
+
+def test_common_free_slots_reject_mixed_timezone_awareness():
+    group = CalendarGroup({"anna": Calendar(tz="Europe/Moscow"), "boris": Calendar()})
+    with pytest.raises(ValueError, match="часовым поясом"):
+        group.find_common_free_slots(["anna", "boris"], datetime(2025, 3, 3), datetime(2025, 3, 4), timedelta(hours=1))
+
+    result = FindCommonFreeSlotsTool(Calendar(), group).forward(["anna"], 60, "2025-03-03", "2025-03-03")
+    assert result["success"] is False
+    assert "часовым поясом" in result["message"]
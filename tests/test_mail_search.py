@@ -0,0 +1,88 @@
+import math
+import random
+from datetime import datetime
+
+import pytest
+
+from tools.mail_search import SearchIndex, stem, tokenize
+from tools.mail_tools import Email, Mailbox
+
+
+@pytest.mark.parametrize(
+    "forms",
+    [
+        ["отчет", "отчета", "отчету", "отчетом", "отчете", "отчеты", "отчетов", "отчетам", "отчетами", "отчетах"],
+        ["бюджет", "бюджета", "бюджету", "бюджетом", "бюджете", "бюджеты", "бюджетов"],
+        ["ответ", "ответа", "ответу", "ответом", "ответе", "ответы", "ответов"],
+        ["встреча", "встречи", "встрече", "встречу", "встречей", "встреч", "встречам"],
+        ["проект", "проекта", "проекту", "проектом", "проекте", "проекты", "проектов"],
+        ["задача", "задачи", "задаче", "задачу", "задачей", "задач", "задачами"],
+    ],
+)
+def test_noun_case_forms_share_stem(forms):
+    assert len({stem(form) for form in forms}) == 1
+
+
+def test_tokenize_normalizes_case_and_yo():
+    assert tokenize("Отчёт") == tokenize("отчет")
+
+
+@pytest.mark.parametrize("query, body", [("отчета", "Прикладываю отчет"), ("бюджет", "Вопрос по бюджету")])
+def test_search_matches_other_case_forms(query, body):
+    mailbox = Mailbox()
+    mailbox.add_email(Email("a@example.com", ["b@example.com"], "Тема", body, "t1", datetime(2025, 1, 1), "e1"))
+    mailbox.add_email(Email("a@example.com", ["b@example.com"], "Другое", "Совсем другое", "t2", datetime(2025, 1, 1), "e2"))
+    assert [email.email_id for email, _ in mailbox.search_emails(query)] == ["e1"]
+
+
+def _exhaustive_bm25(index, query, k1=1.2, b=0.75):
+    n_docs = len(index)
+    avg_length = sum(index._doc_lengths.values()) / n_docs
+    scores = {}
+    for term in dict.fromkeys(tokenize(query)):
+        df = sum(1 for counts in index._doc_terms.values() if term in counts)
+        if not df:
+            continue
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        for doc_id, counts in index._doc_terms.items():
+            tf = counts.get(term)
+            if tf:
+                length_norm = k1 * (1 - b + b * index._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + length_norm)
+    return sorted(scores.values(), reverse=True)
+
+
+def test_pruned_search_matches_exhaustive_bm25():
+    rng = random.Random(7)
+    vocabulary = ["встреча", "проект", "отчет", "бюджет"] + [f"слово{i}" for i in range(300)]
+    index = SearchIndex()
+    for i in range(2000):
+        body = " ".join(rng.choice(vocabulary) for _ in range(rng.randrange(1, 60)))
+        index.add(f"d{i}", [(body, 1)])
+    for i in range(0, 2000, 5):
+        index.remove(f"d{i}")
+    for query in ["встреча", "встреча проект", "бюджет слово7", "слово1 слово2 отчет"]:
+        expected = _exhaustive_bm25(index, query)[:10]
+        assert [score for _, score in index.search(query, 10)] == pytest.approx(expected)
+
+
+def test_restored_index_matches_original(monkeypatch):
+    mailbox = Mailbox()
+    for i, body in enumerate(["Прикладываю отчет по бюджету", "Отчеты за квартал", "Встреча по проекту"]):
+        mailbox.add_email(Email("a@example.com", ["b@example.com"], f"Тема {i}", body, "t1", datetime(2025, 1, 1), f"e{i}"))
+    mailbox.delete_email("e0")
+    data = mailbox.snapshot()
+
+    # Восстановление собирает индекс из колонок снимка, не токенизируя письма заново.
+    monkeypatch.setattr("tools.mail_search.tokenize", None)
+    restored = Mailbox.restore(data)
+    monkeypatch.undo()
+
+    assert restored._search._postings == mailbox._search._postings
+    assert restored._search._doc_terms == mailbox._search._doc_terms
+    def hits(box):
+        return [(email.email_id, score) for email, score in box.search_emails("отчет")]
+
+    assert hits(restored) == hits(mailbox)
+    restored.add_email(Email("c@example.com", [], "Отчет", "Новый отчет", "t2", datetime(2025, 1, 2), "e3"))
+    assert hits(restored)[0][0] == "e3"
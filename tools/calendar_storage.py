@@ -0,0 +1,227 @@
+import json
+import sqlite3
+from datetime import datetime, tzinfo
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.calendar_tools import _MINUTE, Meeting, Priority, Recurrence, _to_minutes, _to_minutes_ceil
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    organizer TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meetings_start_minute ON meetings (start_minute);
+CREATE INDEX IF NOT EXISTS meetings_end_minute ON meetings (end_minute);
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    organizer TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    recurrence TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_COLUMNS = "id, topic, organizer, duration, start_time, priority"
+
+# Встречи не пересекаются, поэтому первая по окончанию встреча, заканчивающаяся
+# после момента :start, является и первой по началу. Оба поиска идут по индексам.
+_FIRST_START_AFTER = (
+    "COALESCE((SELECT start_minute FROM meetings WHERE end_minute > :start "
+    "ORDER BY end_minute LIMIT 1), :end)"
+)
+
+
+class SQLiteMeetingStore:
+    """Хранилище встреч в файле SQLite с интерфейсом `MeetingIndex`.
+
+    При открытии разовые встречи не загружаются: объекты Meeting создаются
+    только для строк, попавших в результат запроса. Серии повторяющихся встреч
+    немногочисленны и читаются в память целиком. Каждое изменение фиксируется сразу.
+    """
+
+    def __init__(self, path: str):
+        """Открывает (или создаёт) базу данных.
+
+        Args:
+            path: Путь к файлу базы данных.
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.series: Dict[int, Meeting] = {
+            row[0]: self._to_meeting(row[:6], Recurrence.from_dict(json.loads(row[6])))
+            for row in self._conn.execute(f"SELECT {_COLUMNS}, recurrence FROM series")
+        }
+
+    def set_timezone(self, tz: tzinfo) -> None:
+        """Переводит серии в часовой пояс календаря.
+
+        В файле хранится только смещение от UTC, а повторения должны
+        вычисляться по местному времени с учётом перехода на летнее время.
+        """
+        self.series = {
+            id: Meeting(
+                s.id, s.topic, s.organizer, s.duration // _MINUTE,
+                s.start_time.astimezone(tz) if s.start_time.tzinfo is not None else s.start_time,
+                s.priority, s.recurrence
+            )
+            for id, s in self.series.items()
+        }
+
+    @staticmethod
+    def _to_meeting(row: Tuple, recurrence: Optional[Recurrence] = None) -> Meeting:
+        id, topic, organizer, duration, start_time, priority = row
+        return Meeting(
+            id, topic, organizer, duration, datetime.fromisoformat(start_time), Priority(priority), recurrence
+        )
+
+    @staticmethod
+    def _to_row(meeting: Meeting) -> Tuple:
+        return (
+            meeting.id, meeting.topic, meeting.organizer,
+            meeting.duration // _MINUTE, meeting.start_time.isoformat(),
+            meeting.priority.value, meeting.start_minute, meeting.end_minute,
+        )
+
+    def _select(self, where: str = "", params: Any = ()) -> Iterator[Meeting]:
+        cursor = self._conn.execute(f"SELECT {_COLUMNS} FROM meetings {where} ORDER BY start_minute", params)
+        return map(self._to_meeting, cursor)
+
+    @property
+    def meetings(self) -> List[Meeting]:
+        """Все встречи в порядке времени начала (читает всю таблицу)."""
+        return list(self._select())
+
+    @property
+    def next_id(self) -> int:
+        """Следующий свободный ID встречи."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        return int(row[0]) if row else 1
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Meeting]:
+        return self._select()
+
+    def _bump_next_id(self, last_id: int) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER))",
+            (last_id + 1,)
+        )
+
+    def _insert(self, meetings: Iterable[Meeting]) -> None:
+        """Вставляет строки встреч в текущую транзакцию."""
+        rows = [self._to_row(m) for m in meetings]
+        if rows:
+            self._conn.executemany("INSERT INTO meetings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._bump_next_id(max(row[0] for row in rows))
+
+    def add(self, meeting: Meeting) -> None:
+        """Записывает встречу."""
+        self.add_many([meeting])
+
+    def add_many(self, meetings: List[Meeting]) -> None:
+        """Записывает несколько встреч одной транзакцией."""
+        with self._conn:
+            self._insert(meetings)
+
+    def get(self, id: int) -> Optional[Meeting]:
+        """Возвращает встречу по ID или None."""
+        row = self._conn.execute(f"SELECT {_COLUMNS} FROM meetings WHERE id = ?", (id,)).fetchone()
+        return self._to_meeting(row) if row else None
+
+    def remove(self, id: int) -> Optional[Meeting]:
+        """Удаляет встречу по ID и возвращает её (или None)."""
+        removed = self.remove_many([id])
+        return removed[0] if removed else None
+
+    def remove_many(self, ids: Iterable[int]) -> List[Meeting]:
+        """Удаляет несколько встреч одной транзакцией.
+
+        Returns:
+            Список удалённых встреч (отсутствующие ID пропускаются).
+        """
+        return self.replace(ids, [])
+
+    def replace(self, ids: Iterable[int], meetings: List[Meeting]) -> List[Meeting]:
+        """Удаляет встречи по ID и записывает новые одной транзакцией.
+
+        При сбое в середине файл остаётся в прежнем состоянии.
+
+        Returns:
+            Список удалённых встреч (отсутствующие ID пропускаются).
+        """
+        removed = [m for m in map(self.get, ids) if m is not None]
+        with self._conn:
+            self._conn.executemany("DELETE FROM meetings WHERE id = ?", [(m.id,) for m in removed])
+            self._insert(meetings)
+        return removed
+
+    def overlapping(self, start_time: datetime, end_time: datetime) -> List[Meeting]:
+        """Возвращает встречи, пересекающиеся с интервалом [start_time, end_time)."""
+        params = {"start": _to_minutes(start_time), "end": _to_minutes_ceil(end_time)}
+        return list(self._select(f"WHERE start_minute < :end AND start_minute >= {_FIRST_START_AFTER}", params))
+
+    def iter_from(self, time: datetime) -> Iterator[Meeting]:
+        """Лениво перебирает встречи, заканчивающиеся после указанного момента."""
+        params = {"start": _to_minutes(time), "end": None}
+        return self._select(f"WHERE start_minute >= {_FIRST_START_AFTER}", params)
+
+    def bounds_between(self, start_minute: int, end_minute: int) -> Tuple[List[int], List[int]]:
+        """Возвращает границы встреч, пересекающихся с интервалом, в порядке начала."""
+        rows = self._conn.execute(
+            f"SELECT start_minute, end_minute FROM meetings "
+            f"WHERE start_minute < :end AND start_minute >= {_FIRST_START_AFTER} ORDER BY start_minute",
+            {"start": start_minute, "end": end_minute}
+        ).fetchall()
+        return [r[0] for r in rows], [r[1] for r in rows]
+
+    def add_series(self, meeting: Meeting) -> None:
+        """Записывает серию повторяющихся встреч."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO series VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._to_row(meeting)[:6] + (json.dumps(meeting.recurrence.to_dict()),)
+            )
+            self._bump_next_id(meeting.id)
+        self.series[meeting.id] = meeting
+
+    def remove_series(self, id: int) -> Optional[Meeting]:
+        """Удаляет серию по ID и возвращает её (или None)."""
+        meeting = self.series.pop(id, None)
+        if meeting is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM series WHERE id = ?", (id,))
+        return meeting
+
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        """Читает сохранённые настройки рабочего времени."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_settings(self, settings: Dict[str, Any]) -> None:
+        """Сохраняет настройки рабочего времени."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('settings', ?)", (json.dumps(settings),)
+            )
+
+    def close(self) -> None:
+        """Закрывает соединение с базой данных."""
+        self._conn.close()
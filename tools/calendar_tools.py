@@ -1,9 +1,15 @@
-from datetime import datetime, timedelta
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone, tzinfo
 from enum import Enum
-from typing import List, Optional, Set, Dict, Any
+from itertools import chain, islice, repeat, takewhile
+from math import lcm
+from operator import add, attrgetter
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from zoneinfo import ZoneInfo
 from smolagents import Tool
-import io
-import sys
+
+from tools.snapshot_format import SnapshotReader, SnapshotWriter, paused_gc
 
 
 class Priority(Enum):
@@ -12,8 +18,232 @@ class Priority(Enum):
     HIGH = 3
 
 
+class Frequency(Enum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+
+
+class DayType(Enum):
+    HOLIDAY = "holiday"  # выходной или праздничный день
+    WORKDAY = "workday"  # рабочий день, перенесённый на выходной
+    SHORT = "short"      # предпраздничный день, сокращённый на один час
+
+
+_WEEKDAY_SHORT_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+
+class Recurrence:
+    """Правило повторения встречи (упрощённое подмножество RRULE).
+
+    Правило хранится один раз; конкретные даты повторений вычисляются лениво
+    только для запрошенного окна.
+    """
+    def __init__(
+        self,
+        frequency: Frequency,
+        interval: int = 1,
+        weekdays: Optional[Iterable[int]] = None,
+        until: Optional[date] = None,
+        count: Optional[int] = None
+    ):
+        """Инициализирует правило повторения.
+
+        Args:
+            frequency: Частота повторения (DAILY или WEEKLY).
+            interval: Шаг повторения в днях или неделях (по умолчанию 1).
+            weekdays: Дни недели для WEEKLY (0=Пн, 6=Вс); по умолчанию — день первой встречи.
+            until: Последняя дата, в которую возможно повторение (включительно).
+            count: Общее количество повторений.
+
+        Raises:
+            ValueError: Если параметры правила некорректны.
+        """
+        if interval < 1:
+            raise ValueError("Шаг повторения должен быть положительным.")
+        if count is not None and count < 1:
+            raise ValueError("Количество повторений должно быть положительным.")
+        if weekdays is not None:
+            weekdays = sorted(set(weekdays))
+            if not weekdays or not all(0 <= d <= 6 for d in weekdays):
+                raise ValueError("Дни недели должны быть числами от 0 до 6.")
+        self.frequency = frequency
+        self.interval = interval
+        self.weekdays: Optional[List[int]] = weekdays
+        self.until: Optional[date] = until.date() if isinstance(until, datetime) else until
+        self.count = count
+
+    @property
+    def period_days(self) -> int:
+        """Длина периода, через который шаблон повторений повторяется, в днях."""
+        return self.interval if self.frequency == Frequency.DAILY else 7 * self.interval
+
+    def _offsets(self, first_day: date) -> List[int]:
+        """Смещения дней повторения от начала периода."""
+        if self.frequency == Frequency.DAILY:
+            return [0]
+        return self.weekdays if self.weekdays is not None else [first_day.weekday()]
+
+    def _period_start(self, first_day: date) -> date:
+        """Начало первого периода (для WEEKLY — понедельник недели первой встречи)."""
+        if self.frequency == Frequency.DAILY:
+            return first_day
+        return first_day - timedelta(days=first_day.weekday())
+
+    def min_gap_days(self, first_day: date) -> int:
+        """Минимальное расстояние между соседними повторениями в днях."""
+        offsets = self._offsets(first_day)
+        gaps = [b - a for a, b in zip(offsets, offsets[1:])]
+        gaps.append(self.period_days - offsets[-1] + offsets[0])
+        return min(gaps)
+
+    def last_day(self, first_day: date) -> Optional[date]:
+        """Вычисляет дату последнего повторения (None — повторения бесконечны).
+
+        Если правило не даёт ни одного повторения, возвращается дата раньше first_day.
+
+        Args:
+            first_day: Дата первой встречи серии.
+        """
+        if self.until is None and self.count is None:
+            return None
+        offsets = self._offsets(first_day)
+        period_start = self._period_start(first_day)
+        last = None
+        if self.until is not None:
+            # Последнее повторение не позже until лежит в периоде until или в предыдущем.
+            period = (self.until - period_start).days // self.period_days
+            candidates = (
+                period_start + timedelta(days=p * self.period_days + o)
+                for p in (period - 1, period) for o in offsets
+            )
+            last = max(
+                (d for d in candidates if first_day <= d <= self.until),
+                default=first_day - timedelta(days=1)
+            )
+        if self.count is not None:
+            first_period = [o for o in offsets if period_start + timedelta(days=o) >= first_day]
+            if self.count <= len(first_period):
+                by_count = period_start + timedelta(days=first_period[self.count - 1])
+            else:
+                periods, position = divmod(self.count - len(first_period) - 1, len(offsets))
+                by_count = period_start + timedelta(days=(periods + 1) * self.period_days + offsets[position])
+            last = by_count if last is None else min(last, by_count)
+        return last
+
+    def iter_days(self, first_day: date, from_day: date) -> Iterator[date]:
+        """Лениво перебирает даты повторений, начиная с from_day.
+
+        Args:
+            first_day: Дата первой встречи серии.
+            from_day: Дата, с которой начинать перебор.
+
+        Returns:
+            Итератор по датам повторений в хронологическом порядке.
+        """
+        last = self.last_day(first_day)
+        offsets = self._offsets(first_day)
+        period_start = self._period_start(first_day)
+        period = max(0, (from_day - period_start).days // self.period_days)
+        while True:
+            base = period_start + timedelta(days=period * self.period_days)
+            for offset in offsets:
+                day = base + timedelta(days=offset)
+                if day < first_day or day < from_day:
+                    continue
+                if last is not None and day > last:
+                    return
+                yield day
+            period += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает структурированное представление правила."""
+        return {
+            "frequency": self.frequency.value,
+            "interval": self.interval,
+            "weekdays": self.weekdays,
+            "until": self.until.isoformat() if self.until else None,
+            "count": self.count
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recurrence":
+        """Восстанавливает правило из результата to_dict."""
+        return cls(
+            Frequency(data["frequency"]),
+            data.get("interval", 1),
+            data.get("weekdays"),
+            date.fromisoformat(data["until"]) if data.get("until") else None,
+            data.get("count")
+        )
+
+    def __str__(self) -> str:
+        if self.frequency == Frequency.DAILY:
+            text = "ежедневно" if self.interval == 1 else f"каждые {self.interval} дн."
+        else:
+            text = "еженедельно" if self.interval == 1 else f"каждые {self.interval} нед."
+            if self.weekdays is not None:
+                text += " по " + ", ".join(_WEEKDAY_SHORT_NAMES[d] for d in self.weekdays)
+        if self.until is not None:
+            text += f" до {self.until.isoformat()}"
+        if self.count is not None:
+            text += f", {self.count} раз"
+        return text
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MINUTE = timedelta(minutes=1)
+_MICROSECOND = timedelta(microseconds=1)
+_SNAPSHOT_MAGIC = b"CALS"
+_HOURS_PER_WEEK = 7 * 24
+
+
+def _to_minutes(time: datetime) -> int:
+    """Переводит момент времени в целое число минут от эпохи (с округлением вниз).
+
+    Для datetime с часовым поясом минуты отсчитываются от эпохи UTC.
+    """
+    return (time - (_EPOCH if time.tzinfo is None else _EPOCH_UTC)) // _MINUTE
+
+
+def _to_minutes_ceil(time: datetime) -> int:
+    """Переводит момент времени в целое число минут от эпохи (с округлением вверх)."""
+    return -(((_EPOCH if time.tzinfo is None else _EPOCH_UTC) - time) // _MINUTE)
+
+
+def _from_minutes(minutes: int, tz: Optional[tzinfo] = None) -> datetime:
+    """Переводит число минут от эпохи обратно в datetime (в часовом поясе tz, если он задан)."""
+    if tz is None:
+        return _EPOCH + timedelta(minutes=minutes)
+    return (_EPOCH_UTC + timedelta(minutes=minutes)).astimezone(tz)
+
+
+def _shift(time: datetime, delta: timedelta) -> datetime:
+    """Сдвигает момент на delta реального времени.
+
+    Сложение aware-datetime с timedelta в Python сдвигает «настенное» время,
+    поэтому через переход на летнее время сдвиг выполняется в UTC.
+    """
+    if time.tzinfo is None:
+        return time + delta
+    return (time.astimezone(timezone.utc) + delta).astimezone(time.tzinfo)
+
+
 class Meeting:
-    """Представляет одну встречу в календаре."""
+    """Представляет одну встречу в календаре.
+
+    Хранится компактно (`__slots__`): время окончания и границы встречи
+    в минутах от эпохи вычисляются один раз при создании. Поля встречи
+    не предназначены для изменения после добавления в календарь.
+
+    Встреча с правилом `recurrence` описывает серию: её start_time — время
+    первого повторения, а конкретные повторения выдаёт `occurrences`.
+    """
+    __slots__ = (
+        "id", "topic", "organizer", "duration", "start_time", "end_time",
+        "priority", "start_minute", "end_minute", "recurrence"
+    )
+
     def __init__(
         self, 
         id: int, 
@@ -21,7 +251,8 @@ class Meeting:
         organizer: str, 
         duration: int, 
         start_time: datetime, 
-        priority: Priority = Priority.MEDIUM
+        priority: Priority = Priority.MEDIUM,
+        recurrence: Optional[Recurrence] = None
     ):
         """Инициализирует объект Meeting.
 
@@ -32,38 +263,604 @@ class Meeting:
             duration: Длительность встречи в минутах.
             start_time: Время начала встречи (объект datetime).
             priority: Приоритет встречи (по умолчанию MEDIUM).
+            recurrence: Правило повторения (None — разовая встреча).
         """
         self.id = id
         self.topic = topic
         self.organizer = organizer
         self.duration = timedelta(minutes=duration)
         self.start_time = start_time
+        self.end_time = _shift(start_time, self.duration)
         self.priority = priority
+        self.start_minute, remainder = divmod(start_time - (_EPOCH if start_time.tzinfo is None else _EPOCH_UTC), _MINUTE)
+        self.end_minute = self.start_minute + duration + (1 if remainder else 0)
+        self.recurrence = recurrence
 
-    @property
-    def end_time(self) -> datetime:
-        """Вычисляет время окончания встречи."""
-        return self.start_time + self.duration
+    def occurrences(self, start_time: datetime, end_time: Optional[datetime] = None) -> Iterator["Meeting"]:
+        """Лениво перебирает повторения, пересекающиеся с окном [start_time, end_time).
+
+        Для разовой встречи выдаёт её саму, если она попадает в окно.
+
+        Args:
+            start_time: Начало окна.
+            end_time: Конец окна (None — без ограничения).
+
+        Returns:
+            Итератор по встречам-повторениям в порядке времени начала.
+        """
+        if self.recurrence is None:
+            if self.end_time > start_time and (end_time is None or self.start_time < end_time):
+                yield self
+            return
+        minutes = self.duration // _MINUTE
+        # Повторения идут по местному времени серии (с учётом её часового пояса).
+        clock = self.start_time.timetz()
+        first_day = self.start_time.date()
+        if start_time <= self.start_time:
+            from_day = first_day
+        else:
+            if self.start_time.tzinfo is not None:
+                start_time = start_time.astimezone(self.start_time.tzinfo)
+            from_day = max(first_day, (start_time - self.duration).date())
+        for day in self.recurrence.iter_days(first_day, from_day):
+            occurrence_start = datetime.combine(day, clock)
+            if end_time is not None and occurrence_start >= end_time:
+                return
+            occurrence = Meeting(self.id, self.topic, self.organizer, minutes, occurrence_start, self.priority, self.recurrence)
+            if occurrence.end_time > start_time:
+                yield occurrence
+
+    def series_end(self) -> Optional[datetime]:
+        """Время окончания последнего повторения (None — серия бесконечна)."""
+        if self.recurrence is None:
+            return self.end_time
+        last_day = self.recurrence.last_day(self.start_time.date())
+        if last_day is None:
+            return None
+        return _shift(datetime.combine(last_day, self.start_time.timetz()), self.duration)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает структурированное представление встречи."""
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "organizer": self.organizer,
+            "duration": self.duration // _MINUTE,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "priority": self.priority.name,
+            "recurrence": self.recurrence.to_dict() if self.recurrence else None
+        }
 
     def __str__(self) -> str:
 
-        return (f"Встреча #{self.id}: «{self.topic}»\n"
+        text = (f"Встреча #{self.id}: «{self.topic}»\n"
                 f"Организатор: {self.organizer}\n"
                 f"Начало: {self.start_time}, Конец: {self.end_time}, Длительность: {self.duration}\n"
                 f"Приоритет: {self.priority.name}")
+        if self.recurrence is not None:
+            text += f"\nПовторение: {self.recurrence}"
+        return text
 
 
-class Calendar:
-    """Управляет списком встреч и настройками рабочего времени."""
+def _meetings_from_columns(
+    ids: Sequence[int],
+    topics: Sequence[str],
+    organizers: Sequence[str],
+    durations: Sequence[int],
+    starts: Sequence[int],
+    priorities: Sequence[int],
+    tz: Optional[tzinfo]
+) -> List[Meeting]:
+    """Собирает разовые встречи из колонок снимка, минуя Meeting.__init__.
+
+    Начало задано в микросекундах от эпохи (UTC для календаря с часовым
+    поясом). Производные поля вычисляются по колонкам целиком встроенными
+    функциями, а в цикле остаётся только заполнение слотов.
+    """
+    epoch = _EPOCH if tz is None else _EPOCH_UTC
+    duration_by_minutes = {minutes: timedelta(minutes=minutes) for minutes in set(durations)}
+    priority_by_value = {p.value: p for p in Priority}
+    deltas = list(map(duration_by_minutes.__getitem__, durations))
+    start_times = list(map(epoch.__add__, map(timedelta, repeat(0), repeat(0), starts)))
+    end_times = list(map(add, start_times, deltas))
+    if tz is not None:
+        start_times = [time.astimezone(tz) for time in start_times]
+        end_times = [time.astimezone(tz) for time in end_times]
+    bounds = map(divmod, starts, repeat(60_000_000))
+
+    new = object.__new__
+    meetings = []
+    for id, topic, organizer, minutes, duration, start_time, end_time, priority, (start_minute, remainder) in zip(
+        ids, topics, organizers, durations, deltas, start_times, end_times,
+        map(priority_by_value.__getitem__, priorities), bounds
+    ):
+        meeting = new(Meeting)
+        meeting.id = id
+        meeting.topic = topic
+        meeting.organizer = organizer
+        meeting.duration = duration
+        meeting.start_time = start_time
+        meeting.end_time = end_time
+        meeting.priority = priority
+        meeting.start_minute = start_minute
+        meeting.end_minute = start_minute + minutes + (1 if remainder else 0)
+        meeting.recurrence = None
+        meetings.append(meeting)
+    return meetings
+
+
+class MeetingIndex:
+    """Интервальный индекс встреч, упорядоченный по времени начала.
+
+    Встречи календаря не пересекаются, поэтому при сортировке по началу
+    их окончания тоже отсортированы. Благодаря этому пересечения с любым
+    интервалом находятся двумя бинарными поисками за O(log n + k).
+    Границы встреч хранятся как целые минуты от эпохи, поэтому сравнения
+    выполняются над int без создания объектов datetime.
+    Параллельно хранится словарь по ID для поиска встречи за O(1).
+
+    Повторяющиеся встречи (серии) хранятся отдельно в словаре `series`:
+    их повторения разворачиваются календарём лениво.
+
+    Индекс живёт только в памяти. Хранилища с тем же интерфейсом (например,
+    `tools.calendar_storage.SQLiteMeetingStore`) можно передать в `Calendar`.
+    """
     def __init__(self):
-        """Инициализирует календарь."""
+        """Инициализирует пустой индекс."""
+        self._starts: List[int] = []
+        self._ends: List[int] = []
         self.meetings: List[Meeting] = []
+        self._by_id: Dict[int, Meeting] = {}
+        self.series: Dict[int, Meeting] = {}
+
+    def __len__(self) -> int:
+        return len(self.meetings)
+
+    def __iter__(self):
+        return iter(self.meetings)
+
+    def add(self, meeting: Meeting) -> None:
+        """Вставляет встречу, сохраняя порядок по времени начала.
+
+        Args:
+            meeting: Встреча, не пересекающаяся с уже проиндексированными.
+        """
+        i = bisect_right(self._starts, meeting.start_minute)
+        self._starts.insert(i, meeting.start_minute)
+        self._ends.insert(i, meeting.end_minute)
+        self.meetings.insert(i, meeting)
+        self._by_id[meeting.id] = meeting
+
+    def add_many(self, meetings: List[Meeting]) -> None:
+        """Вставляет несколько встреч одним слиянием упорядоченных списков.
+
+        Args:
+            meetings: Встречи, упорядоченные по времени начала и не пересекающиеся
+                ни между собой, ни с уже проиндексированными.
+        """
+        # Timsort сливает два упорядоченных отрезка за линейное время.
+        merged = sorted(self.meetings + meetings, key=attrgetter("start_minute"))
+        self._starts = [m.start_minute for m in merged]
+        self._ends = [m.end_minute for m in merged]
+        self.meetings[:] = merged
+        self._by_id.update((m.id, m) for m in meetings)
+
+    def get(self, id: int) -> Optional[Meeting]:
+        """Возвращает встречу по ID или None."""
+        return self._by_id.get(id)
+
+    def remove(self, id: int) -> Optional[Meeting]:
+        """Удаляет встречу из индекса по ID.
+
+        Args:
+            id: Идентификатор встречи.
+
+        Returns:
+            Удалённая встреча или None, если её не было в индексе.
+        """
+        meeting = self._by_id.pop(id, None)
+        if meeting is None:
+            return None
+        i = bisect_left(self._starts, meeting.start_minute)
+        while self.meetings[i] is not meeting:
+            i += 1
+        del self._starts[i]
+        del self._ends[i]
+        del self.meetings[i]
+        return meeting
+
+    def remove_many(self, ids: Iterable[int]) -> List[Meeting]:
+        """Удаляет несколько встреч за один проход по упорядоченным спискам.
+
+        Args:
+            ids: Идентификаторы встреч.
+
+        Returns:
+            Список удалённых встреч (отсутствующие ID пропускаются).
+        """
+        removed = [m for m in map(self._by_id.pop, ids, repeat(None)) if m is not None]
+        if removed:
+            keep = [i for i, m in enumerate(self.meetings) if m.id in self._by_id]
+            self._starts = [self._starts[i] for i in keep]
+            self._ends = [self._ends[i] for i in keep]
+            self.meetings[:] = [self.meetings[i] for i in keep]
+        return removed
+
+    def replace(self, ids: Iterable[int], meetings: List[Meeting]) -> List[Meeting]:
+        """Удаляет встречи по ID и вставляет новые как одно изменение.
+
+        Args:
+            ids: Идентификаторы удаляемых встреч.
+            meetings: Новые встречи, упорядоченные по времени начала.
+
+        Returns:
+            Список удалённых встреч (отсутствующие ID пропускаются).
+        """
+        removed = self.remove_many(ids)
+        self.add_many(meetings)
+        return removed
+
+    def overlapping(self, start_time: datetime, end_time: datetime) -> List[Meeting]:
+        """Возвращает встречи, пересекающиеся с интервалом [start_time, end_time).
+
+        Args:
+            start_time: Начало интервала.
+            end_time: Конец интервала (не включается).
+
+        Returns:
+            Список пересекающихся встреч в порядке времени начала.
+        """
+        lo = bisect_right(self._ends, _to_minutes(start_time))
+        hi = bisect_left(self._starts, _to_minutes_ceil(end_time))
+        return self.meetings[lo:hi]
+
+    def iter_from(self, time: datetime) -> Iterator[Meeting]:
+        """Лениво перебирает встречи, заканчивающиеся после указанного момента.
+
+        Args:
+            time: Момент, с которого начинается перебор.
+
+        Returns:
+            Итератор по встречам в порядке времени начала.
+        """
+        meetings = self.meetings
+        for i in range(bisect_right(self._ends, _to_minutes(time)), len(meetings)):
+            yield meetings[i]
+
+    def bounds_between(self, start_minute: int, end_minute: int) -> Tuple[List[int], List[int]]:
+        """Возвращает границы (в минутах от эпохи) встреч, пересекающихся с интервалом.
+
+        Args:
+            start_minute: Начало интервала.
+            end_minute: Конец интервала (не включается).
+
+        Returns:
+            Пара списков (начала, окончания) в порядке времени начала.
+        """
+        lo = bisect_right(self._ends, start_minute)
+        hi = bisect_left(self._starts, end_minute)
+        return self._starts[lo:hi], self._ends[lo:hi]
+
+    def add_series(self, meeting: Meeting) -> None:
+        """Добавляет серию повторяющихся встреч."""
+        self.series[meeting.id] = meeting
+
+    def remove_series(self, id: int) -> Optional[Meeting]:
+        """Удаляет серию по ID и возвращает её (или None)."""
+        return self.series.pop(id, None)
+
+    def save_settings(self, settings: Dict[str, Any]) -> None:
+        """Настройки календаря в памяти не сохраняются."""
+
+    def close(self) -> None:
+        """Индексу в памяти нечего закрывать."""
+
+
+class ChangeType(Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    WORKING_TIME_CHANGED = "working_time_changed"
+
+
+class CalendarChange:
+    """Событие изменения календаря, передаваемое подписчикам."""
+    __slots__ = ("version", "kind", "meetings", "settings")
+
+    def __init__(
+        self,
+        version: int,
+        kind: ChangeType,
+        meetings: Optional[List[Meeting]] = None,
+        settings: Optional[Dict[str, Any]] = None
+    ):
+        """Инициализирует событие.
+
+        Args:
+            version: Версия календаря после изменения (монотонно возрастает).
+            kind: Тип изменения.
+            meetings: Добавленные или удалённые встречи (серии — одной записью).
+            settings: Новые настройки рабочего времени для WORKING_TIME_CHANGED.
+        """
+        self.version = version
+        self.kind = kind
+        self.meetings: List[Meeting] = meetings or []
+        self.settings = settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает структурированное представление события."""
+        return {
+            "version": self.version,
+            "kind": self.kind.value,
+            "meetings": [m.to_dict() for m in self.meetings],
+            "settings": self.settings
+        }
+
+
+class Calendar:
+    """Управляет списком встреч и настройками рабочего времени.
+
+    Если задан часовой пояс, все моменты времени внутри календаря хранятся
+    с этим поясом: наивные datetime на входе считаются местным временем
+    календаря, а рабочие часы отсчитываются по местным суткам.
+    """
+    def __init__(self, index: Optional[MeetingIndex] = None, tz: Optional[Union[str, tzinfo]] = None):
+        """Инициализирует календарь.
+
+        Args:
+            index: Хранилище встреч (по умолчанию — новый MeetingIndex в памяти).
+            tz: Часовой пояс календаря (имя IANA, например 'Europe/Moscow', или tzinfo).
+                None — наивное время без часового пояса.
+        """
+        self._index = index if index is not None else MeetingIndex()
         self.next_id: int = 1
+        self.tz: Optional[tzinfo] = ZoneInfo(tz) if isinstance(tz, str) else tz
         
         self.working_days: Set[int] = {0, 1, 2, 3, 4}
         
         self.work_start_hour: int = 9  
         self.work_end_hour: int = 18 
+        # Исключения из недельного графика (праздники, переносы, сокращённые дни).
+        self.exception_days: Dict[date, DayType] = {}
+        self._update_working_week()
+
+        # Версия увеличивается при каждом изменении (см. subscribe); по ней
+        # проверяется актуальность кэша get_state_string. Тексты встреч
+        # кэшируются по ID: встречи не изменяются после добавления.
+        self._version: int = 0
+        self._rendered: Dict[int, str] = {}
+        self._state_cache: Optional[Tuple[Tuple, str]] = None
+        self._subscribers: List[Callable[[CalendarChange], None]] = []
+
+    @classmethod
+    def open(cls, path: str, tz: Optional[Union[str, tzinfo]] = None) -> "Calendar":
+        """Открывает календарь, хранящийся в файле SQLite (файл создаётся при необходимости).
+
+        Встречи не загружаются при открытии: они читаются лениво по запросам,
+        а каждое добавление и удаление сразу записывается в файл.
+
+        Args:
+            path: Путь к файлу базы данных.
+            tz: Часовой пояс календаря (None — сохранённый в файле, если есть).
+
+        Returns:
+            Календарь, работающий поверх файла.
+        """
+        from tools.calendar_storage import SQLiteMeetingStore
+
+        store = SQLiteMeetingStore(path)
+        settings = store.load_settings() or {}
+        calendar = cls(index=store, tz=tz if tz is not None else settings.get("timezone"))
+        calendar.next_id = store.next_id
+        if calendar.tz is not None:
+            store.set_timezone(calendar.tz)
+        if settings:
+            calendar._apply_settings(settings)
+        if tz is not None and getattr(calendar.tz, "key", None) != settings.get("timezone"):
+            calendar._save_settings()
+        return calendar
+
+    def close(self) -> None:
+        """Закрывает хранилище встреч."""
+        self._index.close()
+
+    def snapshot(self) -> bytes:
+        """Сохраняет встречи и настройки календаря в компактный бинарный снимок.
+
+        Разовые встречи пишутся колонками (ID, начало в микросекундах от эпохи,
+        длительность, приоритет, темы, организаторы), серии и настройки — JSON.
+
+        Returns:
+            Байты снимка для `Calendar.restore`.
+        """
+        meetings = self.meetings
+        epoch = _EPOCH if self.tz is None else _EPOCH_UTC
+        writer = SnapshotWriter(_SNAPSHOT_MAGIC)
+        writer.add_json({
+            "next_id": self.next_id,
+            "settings": self._settings(),
+            "series": [series.to_dict() for series in self.recurring_meetings],
+        })
+        writer.add_ints([m.id for m in meetings])
+        writer.add_ints([(m.start_time - epoch) // _MICROSECOND for m in meetings])
+        writer.add_ints([m.duration // _MINUTE for m in meetings], "i")
+        writer.add_ints([m.priority.value for m in meetings], "b")
+        writer.add_strings([m.topic for m in meetings])
+        writer.add_strings([m.organizer for m in meetings])
+        return writer.to_bytes()
+
+    @classmethod
+    def restore(cls, data: bytes) -> "Calendar":
+        """Восстанавливает календарь (в памяти) из снимка `snapshot`.
+
+        Args:
+            data: Байты снимка.
+
+        Returns:
+            Новый календарь с теми же встречами, сериями и настройками.
+
+        Raises:
+            ValueError: Если данные не являются снимком календаря.
+        """
+        with paused_gc():
+            return cls._restore(SnapshotReader(data, _SNAPSHOT_MAGIC))
+
+    @classmethod
+    def _restore(cls, reader: SnapshotReader) -> "Calendar":
+        """Читает колонки снимка и собирает объект."""
+        header = reader.read_json()
+        settings = header["settings"]
+        calendar = cls(tz=settings.get("timezone"))
+        calendar._apply_settings(settings)
+        calendar.next_id = header["next_id"]
+
+        ids, starts, durations, priorities = (reader.read_ints() for _ in range(4))
+        topics, organizers = reader.read_strings(), reader.read_strings()
+        # Встречи записаны в порядке начала, поэтому индекс строится без пересортировки.
+        calendar._index.add_many(_meetings_from_columns(
+            ids, topics, organizers, durations, starts, priorities, calendar.tz
+        ))
+
+        for item in header["series"]:
+            start_time = datetime.fromisoformat(item["start_time"])
+            calendar._index.add_series(Meeting(
+                item["id"], item["topic"], item["organizer"], item["duration"],
+                calendar._localize(start_time) if start_time.tzinfo is not None else start_time,
+                Priority[item["priority"]], Recurrence.from_dict(item["recurrence"])
+            ))
+        return calendar
+
+    @property
+    def meetings(self) -> List[Meeting]:
+        """Разовые встречи календаря в порядке времени начала."""
+        return self._index.meetings
+
+    @property
+    def recurring_meetings(self) -> List[Meeting]:
+        """Серии повторяющихся встреч в порядке времени первого повторения."""
+        return sorted(self._index.series.values(), key=attrgetter("start_minute"))
+
+    def _is_empty(self) -> bool:
+        """Проверяет, что в календаре нет ни разовых встреч, ни серий."""
+        return not len(self._index) and not self._index.series
+
+    def _iter_occurrences(self, start_time: datetime, end_time: Optional[datetime]) -> Iterator[Meeting]:
+        """Лениво перебирает повторения всех серий в окне в порядке времени начала."""
+        return heapq.merge(
+            *(series.occurrences(start_time, end_time) for series in self._index.series.values()),
+            key=attrgetter("start_minute")
+        )
+
+    @property
+    def version(self) -> int:
+        """Текущая версия календаря; увеличивается при каждом изменении."""
+        return self._version
+
+    def subscribe(self, callback: Callable[[CalendarChange], None]) -> None:
+        """Подписывает обработчик на события изменения календаря.
+
+        Обработчик вызывается синхронно после каждого изменения
+        с объектом CalendarChange.
+
+        Args:
+            callback: Функция, принимающая CalendarChange.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[CalendarChange], None]) -> None:
+        """Отписывает обработчик (отсутствующий обработчик игнорируется)."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(
+        self,
+        kind: ChangeType,
+        meetings: Optional[List[Meeting]] = None,
+        settings: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Увеличивает версию, сбрасывает кэш удалённых встреч и оповещает подписчиков."""
+        self._version += 1
+        if kind == ChangeType.REMOVED:
+            for meeting in meetings:
+                self._rendered.pop(meeting.id, None)
+        change = CalendarChange(self._version, kind, meetings, settings)
+        for callback in list(self._subscribers):
+            callback(change)
+
+    def _render(self, meeting: Meeting) -> str:
+        """Возвращает текст встречи, используя кэш (повторения серий не кэшируются)."""
+        if meeting.recurrence is not None and self._index.series.get(meeting.id) is not meeting:
+            return str(meeting)
+        text = self._rendered.get(meeting.id)
+        if text is None:
+            text = self._rendered[meeting.id] = str(meeting)
+        return text
+
+    def _localize(self, time: Optional[datetime]) -> Optional[datetime]:
+        """Приводит момент времени к часовому поясу календаря.
+
+        Наивное время считается местным временем календаря. Для календаря
+        без часового пояса время возвращается без изменений.
+        """
+        if self.tz is None or time is None:
+            return time
+        return time.replace(tzinfo=self.tz) if time.tzinfo is None else time.astimezone(self.tz)
+
+    def _update_working_week(self) -> None:
+        """Пересчитывает недельную маску рабочих часов и таблицы переходов.
+
+        Бит (день недели * 24 + час) маски установлен для рабочих часов.
+        Для каждого часа недели заранее вычисляются расстояние до ближайшего
+        рабочего часа и длина непрерывного рабочего отрезка, начинающегося
+        с него, поэтому is_working_time, _next_working_time и
+        fits_working_time работают за O(1).
+        """
+        working = [
+            day in self.working_days and self.work_start_hour <= hour < self.work_end_hour
+            for day in range(7) for hour in range(24)
+        ]
+        self._working_mask = sum(1 << hour for hour, is_working in enumerate(working) if is_working)
+        self._next_working_offset = [0] * _HOURS_PER_WEEK
+        self._working_run = [0] * _HOURS_PER_WEEK
+        # Неделя циклична: второй проход назад даёт верные значения на её стыке.
+        offset = run = 0
+        for position in reversed(range(2 * _HOURS_PER_WEEK)):
+            hour = position % _HOURS_PER_WEEK
+            if working[hour]:
+                offset, run = 0, min(run + 1, _HOURS_PER_WEEK)
+            else:
+                offset, run = offset + 1, 0
+            if position < _HOURS_PER_WEEK:
+                self._next_working_offset[hour] = offset
+                self._working_run[hour] = run
+
+    def _settings(self) -> Dict[str, Any]:
+        """Возвращает настройки рабочего времени в виде, пригодном для JSON."""
+        return {
+            "working_days": sorted(self.working_days),
+            "work_start_hour": self.work_start_hour,
+            "work_end_hour": self.work_end_hour,
+            "timezone": getattr(self.tz, "key", None),
+            "exception_days": {day.isoformat(): day_type.value for day, day_type in sorted(self.exception_days.items())},
+        }
+
+    def _apply_settings(self, settings: Dict[str, Any]) -> None:
+        """Применяет сохранённые настройки рабочего времени (без оповещения подписчиков)."""
+        self.working_days = set(settings["working_days"])
+        self.work_start_hour = settings["work_start_hour"]
+        self.work_end_hour = settings["work_end_hour"]
+        self.exception_days = {
+            date.fromisoformat(day): DayType(day_type)
+            for day, day_type in settings.get("exception_days", {}).items()
+        }
+        self._update_working_week()
+
+    def _save_settings(self) -> None:
+        """Передаёт настройки рабочего времени в хранилище и оповещает подписчиков."""
+        self._update_working_week()
+        settings = self._settings()
+        self._index.save_settings(settings)
+        self._notify(ChangeType.WORKING_TIME_CHANGED, settings=settings)
 
     def set_working_days(self, days: Set[int]) -> None:
         """Устанавливает рабочие дни недели.
@@ -72,6 +869,56 @@ class Calendar:
             days: Множество целых чисел, представляющих рабочие дни (0=Пн, 6=Вс).
         """
         self.working_days = days
+        self._save_settings()
+
+    def set_exception_days(self, days: Dict[date, DayType]) -> None:
+        """Устанавливает исключения из недельного графика.
+
+        Args:
+            days: Словарь «дата -> тип дня»; заменяет ранее заданные исключения.
+        """
+        self.exception_days = dict(days)
+        self._save_settings()
+
+    def load_exception_days(self, path: str) -> int:
+        """Загружает исключения (например, производственный календарь) из текстового файла.
+
+        Каждая строка файла имеет вид `ГГГГ-ММ-ДД[,holiday|workday|short]`;
+        тип по умолчанию — holiday. Пустые строки и строки, начинающиеся
+        с `#`, пропускаются. Загруженные даты дополняют уже заданные.
+
+        Args:
+            path: Путь к файлу.
+
+        Returns:
+            Количество загруженных дат.
+
+        Raises:
+            ValueError: Если строка файла имеет неверный формат.
+        """
+        days = {}
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                day, _, day_type = line.partition(",")
+                try:
+                    days[date.fromisoformat(day.strip())] = DayType(day_type.strip().lower() or DayType.HOLIDAY.value)
+                except ValueError:
+                    raise ValueError(f"Неверный формат строки {line_number} в файле {path}: {line!r}")
+        self.set_exception_days({**self.exception_days, **days})
+        return len(days)
+
+    def _day_hours(self, day: date) -> Optional[Tuple[int, int]]:
+        """Возвращает рабочие часы (начало, конец) в дату day или None для нерабочего дня."""
+        day_type = self.exception_days.get(day)
+        if day_type is None:
+            return (self.work_start_hour, self.work_end_hour) if day.weekday() in self.working_days else None
+        if day_type == DayType.HOLIDAY:
+            return None
+        end_hour = self.work_end_hour - 1 if day_type == DayType.SHORT else self.work_end_hour
+        return (self.work_start_hour, end_hour) if end_hour > self.work_start_hour else None
 
     def set_working_hours(self, start_hour: int, end_hour: int) -> None:
         """Устанавливает рабочие часы.
@@ -86,6 +933,7 @@ class Calendar:
         if 0 <= start_hour < end_hour <= 24:
             self.work_start_hour = start_hour
             self.work_end_hour = end_hour
+            self._save_settings()
         else:
             raise ValueError("Некорректные рабочие часы")
 
@@ -98,10 +946,49 @@ class Calendar:
         Returns:
             True, если время рабочее, иначе False.
         """
-        if time.weekday() not in self.working_days:
+        time = self._localize(time)
+        if time.date() in self.exception_days:
+            hours = self._day_hours(time.date())
+            return hours is not None and hours[0] <= time.hour < hours[1]
+        return bool(self._working_mask >> (time.weekday() * 24 + time.hour) & 1)
+
+    def fits_working_time(self, start_time: datetime, duration: timedelta) -> bool:
+        """Проверяет, что интервал целиком лежит в непрерывном рабочем времени.
+
+        Args:
+            start_time: Начало интервала.
+            duration: Длительность интервала.
+
+        Returns:
+            True, если интервал начинается в рабочее время и заканчивается
+            не позже конца этого рабочего отрезка.
+        """
+        start_time = self._localize(start_time)
+        if self.exception_days:
+            return self._fits_working_days(start_time, _shift(start_time, duration))
+        run = self._working_run[start_time.weekday() * 24 + start_time.hour]
+        if run == 0:
             return False
-            
-        return self.work_start_hour <= time.hour < self.work_end_hour
+        if run == _HOURS_PER_WEEK:
+            return True
+        run_end = start_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=run)
+        return _shift(start_time, duration) <= run_end
+
+    def _fits_working_days(self, start_time: datetime, end_time: datetime) -> bool:
+        """Проверяет интервал по рабочим часам отдельных дней (с учётом исключений)."""
+        day = start_time.date()
+        hours = self._day_hours(day)
+        if hours is None or not self._at_hour(day, hours[0]) <= start_time < self._at_hour(day, hours[1]):
+            return False
+        while end_time > self._at_hour(day, hours[1]):
+            # Рабочий отрезок продолжается только через полночь в следующий рабочий день с 0 часов.
+            if hours[1] != 24:
+                return False
+            day += timedelta(days=1)
+            hours = self._day_hours(day)
+            if hours is None or hours[0] != 0:
+                return False
+        return True
 
     def add_meeting(
         self, 
@@ -122,93 +1009,565 @@ class Calendar:
 
         Returns:
             True, если встреча успешно добавлена, иначе False (если время занято).
+
+        Raises:
+            ValueError: Если длительность не положительна или время занято.
         """
         # if start_time <= datetime.now():
         #     raise ValueError(f"Невозможно добавить встречу в прошлом. Укажите время в будущем. Сегодня {datetime.now().strftime('%Y-%m-%d')}")
-            
-        free = True
-        for m in self.meetings:
-            if start_time < m.end_time and m.start_time < (start_time + timedelta(minutes=duration)):
-                free = False
-                break
+        if duration <= 0:
+            raise ValueError("Длительность встречи должна быть положительной.")
+        start_time = self._localize(start_time)
+
+        free = not self.get_conflicting_meetings(start_time, timedelta(minutes=duration))
         
         if free:
             new_meeting = Meeting(self.next_id, topic, organizer, duration, start_time, priority)
-            self.meetings.append(new_meeting)
+            self._index.add(new_meeting)
             self.next_id += 1
+            self._notify(ChangeType.ADDED, [new_meeting])
             return True
         else:
             raise ValueError("Запрошенное время занято.")
 
-    def remove_meeting(self, id: int) -> bool:
-        """Удаляет встречу по её идентификатору.
+    def add_meeting_displacing(
+        self,
+        topic: str,
+        organizer: str,
+        duration: int,
+        start_time: datetime,
+        priority: Priority = Priority.MEDIUM
+    ) -> List[Tuple[Meeting, Meeting]]:
+        """Добавляет встречу, перенося пересекающиеся встречи с более низким приоритетом.
+
+        Вытесненные встречи сохраняют свои ID и взаимный порядок и за один
+        проход по свободным промежуткам (начиная с start_time) ставятся
+        в ближайшие подходящие слоты рабочего времени. Слоты подбираются до
+        изменения календаря, а удаление и вставка встреч записываются
+        в хранилище одним изменением.
+
+        Args:
+            topic: Тема встречи.
+            organizer: Организатор встречи.
+            duration: Длительность встречи в минутах.
+            start_time: Желаемое время начала встречи.
+            priority: Приоритет встречи.
+
+        Returns:
+            Список пар (прежняя встреча, перенесённая встреча) в порядке исходного времени.
+
+        Raises:
+            ValueError: Если длительность не положительна, время занято встречей
+                с не меньшим приоритетом или повторением серии, либо вытесненную
+                встречу невозможно перенести.
+        """
+        if duration <= 0:
+            raise ValueError("Длительность встречи должна быть положительной.")
+        start_time = self._localize(start_time)
+
+        bumped = self.get_conflicting_meetings(start_time, timedelta(minutes=duration))
+        if any(m.recurrence is not None or m.priority.value >= priority.value for m in bumped):
+            raise ValueError("Запрошенное время занято.")
+        new_meeting = Meeting(self.next_id, topic, organizer, duration, start_time, priority)
+        bumped_ids = {m.id for m in bumped}
+
+        # Слоты ищутся до изменения календаря, как будто вытесненных встреч уже нет,
+        # а новая добавлена; затем всё записывается одним изменением хранилища.
+        moves = []
+        if bumped:
+            gaps = self._iter_free_intervals(
+                start_time, None, min(m.duration for m in bumped), bumped_ids, [new_meeting]
+            )
+            slot_start, gap_end = next(gaps)
+            for meeting in bumped:
+                while gap_end - slot_start < meeting.duration:
+                    slot_start, gap_end = next(gaps)
+                moved = Meeting(
+                    meeting.id, meeting.topic, meeting.organizer,
+                    meeting.duration // _MINUTE, slot_start, meeting.priority
+                )
+                moves.append((meeting, moved))
+                slot_start = moved.end_time
+            gaps.close()
+
+        added = sorted([new_meeting] + [moved for _, moved in moves], key=attrgetter("start_minute"))
+        self._index.replace(bumped_ids, added)
+        self.next_id += 1
+        if bumped:
+            self._notify(ChangeType.REMOVED, bumped)
+        self._notify(ChangeType.ADDED, [new_meeting] + [moved for _, moved in moves])
+        return moves
+
+    def add_recurring_meeting(
+        self,
+        topic: str,
+        organizer: str,
+        duration: int,
+        start_time: datetime,
+        recurrence: Recurrence,
+        priority: Priority = Priority.MEDIUM
+    ) -> bool:
+        """Добавляет серию повторяющихся встреч, если ни одно повторение не занято.
+
+        Серия хранится одной записью; повторения разворачиваются лениво.
+
+        Args:
+            topic: Тема встречи.
+            organizer: Организатор встречи.
+            duration: Длительность каждого повторения в минутах.
+            start_time: Время начала первого повторения.
+            recurrence: Правило повторения.
+            priority: Приоритет встречи.
+
+        Returns:
+            True, если серия успешно добавлена.
+
+        Raises:
+            ValueError: Если длительность некорректна или какое-либо повторение конфликтует с календарём.
+        """
+        if duration <= 0:
+            raise ValueError("Длительность встречи должна быть положительной.")
+        start_time = self._localize(start_time)
+        if timedelta(minutes=duration) > timedelta(days=recurrence.min_gap_days(start_time.date())):
+            raise ValueError("Повторения встречи пересекаются друг с другом.")
+
+        first_day = next(recurrence.iter_days(start_time.date(), start_time.date()), None)
+        if first_day is None:
+            raise ValueError("Правило повторения не даёт ни одного повторения.")
+        start_time = datetime.combine(first_day, start_time.timetz())
+
+        series = Meeting(self.next_id, topic, organizer, duration, start_time, priority, recurrence)
+        if self._get_series_conflicts(series):
+            raise ValueError("Запрошенное время занято.")
+        self._index.add_series(series)
+        self.next_id += 1
+        self._notify(ChangeType.ADDED, [series])
+        return True
+
+    def _get_series_conflicts(self, series: Meeting) -> List[Meeting]:
+        """Находит встречи и повторения других серий, пересекающиеся с повторениями серии."""
+        conflicts = []
+        series_end = series.series_end()
+        for meeting in self._index.iter_from(series.start_time):
+            if series_end is not None and meeting.start_time >= series_end:
+                break
+            if next(series.occurrences(meeting.start_time, meeting.end_time), None) is not None:
+                conflicts.append(meeting)
+
+        for other in self._index.series.values():
+            # Для дат после начала обеих серий совместный шаблон повторений
+            # периодичен с периодом НОК, поэтому достаточно проверить один период.
+            longest = max(series.duration, other.duration)
+            window_start = max(series.start_time, other.start_time) - longest
+            period = lcm(series.recurrence.period_days, other.recurrence.period_days)
+            window_end = window_start + timedelta(days=period + 2) + 2 * longest
+            occurrences = heapq.merge(
+                series.occurrences(window_start, window_end),
+                other.occurrences(window_start, window_end),
+                key=attrgetter("start_minute")
+            )
+            previous = None
+            for occurrence in occurrences:
+                if previous is not None and previous.end_minute > occurrence.start_minute:
+                    conflicts.append(other)
+                    break
+                if previous is None or occurrence.end_minute > previous.end_minute:
+                    previous = occurrence
+        return conflicts
+
+    def add_meetings_bulk(self, rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
+        """Добавляет пакет встреч с векторизованной проверкой конфликтов.
+
+        Кандидаты сортируются по времени начала; пересечения с существующими
+        встречами проверяются бинарным поиском по массивам NumPy для всего пакета
+        сразу. Среди пересекающихся кандидатов пакета принимается тот, что
+        начинается раньше (при равенстве — стоящий раньше во входных данных).
+
+        Args:
+            rows: Кортежи (topic, organizer, duration, start_time[, priority]) —
+                те же аргументы, что и у add_meeting.
+
+        Returns:
+            Отчёт по каждой входной строке в исходном порядке: словари с ключами
+            "row", "accepted", "id" (ID новой встречи или None) и "reason"
+            (None, "invalid_duration", "conflict_existing" или "conflict_batch").
+        """
+        import numpy as np
+
+        rows = list(rows)
+        n = len(rows)
+        report = [{"row": i, "accepted": False, "id": None, "reason": None} for i in range(n)]
+        if not rows:
+            return report
+
+        start_times = [row[3] for row in rows]
+        if self.tz is not None:
+            start_times = list(map(self._localize, start_times))
+        durations = np.fromiter((row[2] for row in rows), dtype=np.int64, count=n)
+        starts = np.fromiter(map(_to_minutes, start_times), dtype=np.int64, count=n)
+        ends = np.fromiter(map(_to_minutes_ceil, start_times), dtype=np.int64, count=n) + durations
+
+        order = np.argsort(starts, kind="stable")
+        sorted_starts, sorted_ends = starts[order], ends[order]
+        valid = durations[order] > 0
+
+        window_start, window_end = int(starts.min()), int(ends.max())
+        existing_starts, existing_ends = self._index.bounds_between(window_start, window_end)
+        occurrences = list(self._iter_occurrences(
+            _from_minutes(window_start, self.tz), _from_minutes(window_end, self.tz)
+        ))
+        if occurrences:
+            bounds = sorted(chain(
+                zip(existing_starts, existing_ends),
+                ((o.start_minute, o.end_minute) for o in occurrences)
+            ))
+            existing_starts, existing_ends = [b[0] for b in bounds], [b[1] for b in bounds]
+        existing_starts = np.array(existing_starts, dtype=np.int64)
+        existing_ends = np.array(existing_ends, dtype=np.int64)
+        nxt = np.searchsorted(existing_ends, sorted_starts, side="right")
+        has_next = nxt < len(existing_starts)
+        clash_existing = np.zeros(n, dtype=bool)
+        clash_existing[has_next] = existing_starts[nxt[has_next]] < sorted_ends[has_next]
+
+        candidate = valid & ~clash_existing
+        candidate_ends = np.where(candidate, sorted_ends, np.iinfo(np.int64).min)
+        prev_max_end = np.maximum.accumulate(np.concatenate(([np.iinfo(np.int64).min], candidate_ends[:-1])))
+        accepted = candidate & (prev_max_end <= sorted_starts)
+        if np.any(candidate & ~accepted):
+            # Внутри пакета есть пересечения: разрешаем их жадно по времени начала.
+            accepted = np.zeros(n, dtype=bool)
+            last_end = None
+            for pos in np.flatnonzero(candidate).tolist():
+                if last_end is None or sorted_starts[pos] >= last_end:
+                    accepted[pos] = True
+                    last_end = sorted_ends[pos]
+
+        rejected = np.flatnonzero(~accepted)
+        for row_idx, is_valid, clashes in zip(
+            order[rejected].tolist(), valid[rejected].tolist(), clash_existing[rejected].tolist()
+        ):
+            if not is_valid:
+                report[row_idx]["reason"] = "invalid_duration"
+            elif clashes:
+                report[row_idx]["reason"] = "conflict_existing"
+            else:
+                report[row_idx]["reason"] = "conflict_batch"
+
+        # ID назначаются в порядке входных строк, как при последовательных вызовах add_meeting.
+        accepted_rows = order[accepted]
+        in_input_order = np.zeros(n, dtype=bool)
+        in_input_order[accepted_rows] = True
+        ids = np.cumsum(in_input_order) - 1 + self.next_id
+
+        new_meetings = []
+        for row_idx, meeting_id in zip(accepted_rows.tolist(), ids[accepted_rows].tolist()):
+            row = rows[row_idx]
+            priority = row[4] if len(row) > 4 else Priority.MEDIUM
+            new_meetings.append(Meeting(meeting_id, row[0], row[1], row[2], start_times[row_idx], priority))
+            report[row_idx]["accepted"] = True
+            report[row_idx]["id"] = meeting_id
+        self.next_id += len(new_meetings)
+
+        self._index.add_many(new_meetings)
+        if new_meetings:
+            self._notify(ChangeType.ADDED, new_meetings)
+        return report
+
+    def get_meeting(self, id: int) -> Optional[Meeting]:
+        """Возвращает встречу по её идентификатору.
+
+        Args:
+            id: Идентификатор встречи.
+
+        Returns:
+            Объект Meeting (разовая встреча или серия) или None, если встреча не найдена.
+        """
+        meeting = self._index.get(id)
+        return meeting if meeting is not None else self._index.series.get(id)
+
+    def remove_meeting(self, id: int) -> bool:
+        """Удаляет встречу по её идентификатору.
+
+        Args:
+            id: Идентификатор встречи для удаления.
+
+        Returns:
+            True, если встреча найдена и удалена, иначе False.
+        """
+        removed = self._index.remove(id)
+        if removed is None:
+            removed = self._index.remove_series(id)
+        if removed is not None:
+            self._notify(ChangeType.REMOVED, [removed])
+            print(f"Встреча {id} удалена")
+            return True
+        print(f"Встреча {id} не найдена")
+        return False
+
+    def remove_meetings(self, ids: Iterable[int]) -> List[int]:
+        """Удаляет несколько встреч за один проход.
+
+        Args:
+            ids: Идентификаторы встреч для удаления.
+
+        Returns:
+            Список идентификаторов действительно удалённых встреч.
+        """
+        ids = list(ids)
+        removed = self._index.remove_many(ids)
+        removed_set = {m.id for m in removed}
+        for id in ids:
+            if id not in removed_set:
+                series = self._index.remove_series(id)
+                if series is not None:
+                    removed.append(series)
+                    removed_set.add(id)
+        if removed:
+            self._notify(ChangeType.REMOVED, removed)
+        return [m.id for m in removed]
+
+    def meetings_between(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[Meeting]:
+        """Возвращает встречи, пересекающиеся с интервалом [start_time, end_time).
+
+        Разовые встречи ищутся по индексу за O(log n + k), повторения серий
+        разворачиваются только внутри окна. Если верхняя граница не задана,
+        бесконечное число повторений развернуть нельзя, и каждая ещё не
+        завершившаяся серия попадает в список одной записью.
+
+        Args:
+            start_time: Начало интервала (None — без ограничения снизу).
+            end_time: Конец интервала (None — без ограничения сверху).
+
+        Returns:
+            Список встреч в порядке времени начала.
+        """
+        start_time = self._localize(start_time or datetime.min)
+        end_time = self._localize(end_time)
+        meetings = self._index.overlapping(start_time, end_time or self._localize(datetime.max))
+        if end_time is None:
+            active_series = [s for s in self.recurring_meetings if next(s.occurrences(start_time), None) is not None]
+            return list(heapq.merge(meetings, active_series, key=attrgetter("start_minute")))
+        return list(heapq.merge(meetings, self._iter_occurrences(start_time, end_time), key=attrgetter("start_minute")))
+
+    def format_meetings(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> str:
+        """Возвращает текстовый список встреч (всех или из указанного интервала).
+
+        Args:
+            start_time: Начало интервала (None — без ограничения снизу).
+            end_time: Конец интервала (None — без ограничения сверху).
+
+        Returns:
+            Строка с описаниями встреч, по одной на блок.
+        """
+        if self._is_empty():
+            return "Календарь пуст"
+        meetings = self.meetings_between(start_time, end_time)
+        if not meetings:
+            return "В указанном периоде встреч нет"
+        return "\n".join(map(self._render, meetings))
+
+    def list_meetings(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> None:
+        """Выводит список встреч (всех или из указанного интервала) в стандартный вывод.
+
+        Args:
+            start_time: Начало интервала (None — без ограничения снизу).
+            end_time: Конец интервала (None — без ограничения сверху).
+        """
+        print(self.format_meetings(start_time, end_time))
+
+    def find_next_free_slot(self, start_time: datetime, duration: timedelta) -> datetime:
+        """Находит ближайший свободный временной слот заданной длительности, начиная с указанного времени, с учетом рабочего графика.
+
+        Args:
+            start_time: Время, с которого начинать поиск.
+            duration: Требуемая длительность слота.
+
+        Returns:
+            Объект datetime, представляющий начало ближайшего свободного слота.
+
+        Raises:
+            ValueError: Если рабочие дни не заданы, слот не помещается в рабочий день
+                или повторяющиеся встречи не оставляют свободного времени.
+        """
+        slot_start, _ = next(self._iter_free_intervals(start_time, None, duration))
+        return self._localize(slot_start)
+
+    def find_free_slots(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        duration: timedelta,
+        limit: Optional[int] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Находит свободные промежутки рабочего времени, в которые помещается встреча заданной длительности.
+
+        Args:
+            start_time: Начало окна поиска.
+            end_time: Конец окна поиска (не включается).
+            duration: Требуемая длительность слота.
+            limit: Максимальное количество слотов (None — все слоты в окне).
+
+        Returns:
+            Список пар (начало, конец) свободных промежутков в хронологическом порядке.
+            Встречу можно начать в любой момент от начала промежутка до (конец - duration).
+
+        Raises:
+            ValueError: Если рабочие дни не заданы или слот не помещается в рабочий день.
+        """
+        return [
+            (self._localize(slot_start), self._localize(slot_end))
+            for slot_start, slot_end in islice(self._iter_free_intervals(start_time, end_time, duration), limit)
+        ]
+
+    def _iter_free_intervals(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime],
+        duration: timedelta,
+        removed_ids: Collection[int] = (),
+        added: Sequence[Meeting] = ()
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        """Перебирает свободные промежутки рабочего времени одним проходом вперёд.
 
         Args:
-            id: Идентификатор встречи для удаления.
+            start_time: Время, с которого начинать поиск.
+            end_time: Конец окна поиска (None — без ограничения).
+            duration: Минимальная длительность промежутка.
+            removed_ids: ID встреч, которые считаются уже удалёнными.
+            added: Ещё не записанные встречи, упорядоченные по началу.
 
         Returns:
-            True, если встреча найдена и удалена, иначе False.
+            Итератор по парам (начало, конец) свободных промежутков.
+
+        Raises:
+            ValueError: Если рабочие дни не заданы или слот не помещается в рабочий день.
         """
-        for m in self.meetings:
-            if m.id == id:
-                self.meetings.remove(m)
-                print(f"Встреча {id} удалена")
-                return True
-        print(f"Встреча {id} не найдена")
-        return False
+        if not self.working_days:
+            raise ValueError("Не заданы рабочие дни.")
+        if duration > timedelta(hours=self.work_end_hour - self.work_start_hour):
+            raise ValueError("Требуемая длительность превышает продолжительность рабочего дня.")
+        start_time, end_time = self._localize(start_time), self._localize(end_time)
+        busy = self._iter_busy_intervals(start_time, end_time, removed_ids, added)
+        if end_time is None:
+            busy = self._stop_when_no_gaps(busy, start_time, duration, added)
+        return _iter_gaps(busy, start_time, end_time, duration)
 
-    def list_meetings(self) -> None:
-        """Выводит список всех встреч в стандартный вывод."""
-        if not self.meetings:
-            print("Календарь пуст")
-        for m in self.meetings:
-            print(m)
+    def _stop_when_no_gaps(
+        self,
+        busy: Iterator[Tuple[datetime, datetime]],
+        start_time: datetime,
+        duration: timedelta,
+        added: Sequence[Meeting] = ()
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        """Ограничивает бесконечный поиск свободного времени.
 
-    def find_next_free_slot(self, start_time: datetime, duration: timedelta) -> datetime:
-        """Находит ближайший свободный временной слот заданной длительности, начиная с указанного времени, с учетом рабочего графика.
+        После последнего исключения, начала и конца каждой серии и последней
+        разовой встречи занятость повторяется с периодом НОК всех серий
+        (и недели рабочего графика). Если за такой период не нашлось ни
+        одного промежутка длиной duration, его не будет и дальше.
 
         Args:
-            start_time: Время, с которого начинать поиск.
-            duration: Требуемая длительность слота.
+            busy: Занятые интервалы без ограничения сверху, упорядоченные по началу.
+            start_time: Начало поиска.
+            duration: Минимальная длительность промежутка.
+            added: Ещё не записанные встречи.
 
         Returns:
-            Объект datetime, представляющий начало ближайшего свободного слота.
+            Те же занятые интервалы.
+
+        Raises:
+            ValueError: Если свободного промежутка нужной длительности нет.
         """
-        current_time = start_time
-        
-        if not self.is_working_time(current_time):
-            current_time = self._next_working_time(current_time)
-            
-        sorted_meetings = sorted(self.meetings, key=lambda m: m.start_time)
-        if not sorted_meetings:
-             if current_time.hour < self.work_start_hour:
-                 current_time = current_time.replace(hour=self.work_start_hour, minute=0, second=0, microsecond=0)
-             return current_time
-        
-        while True:
-            is_free = True
-            potential_end_time = current_time + duration            
-            for meeting in sorted_meetings:
-                if current_time < meeting.end_time and meeting.start_time < potential_end_time:
-                    is_free = False
-                    current_time = meeting.end_time 
-                    if not self.is_working_time(current_time):
-                         current_time = self._next_working_time(current_time)
-                    break
-            
-            if is_free:
-                end_of_workday = datetime(
-                    current_time.year, 
-                    current_time.month, 
-                    current_time.day, 
-                    self.work_end_hour, 
-                    0, 
-                    0
-                )
-                if potential_end_time <= end_of_workday:
-                    return current_time
-                else:
-                    current_time = self._next_working_time(current_time.replace(hour=self.work_end_hour))
+        series = list(self._index.series.values())
+        # Запас в сутки — на повторения, переходящие через полночь.
+        period = timedelta(days=lcm(7, *(s.recurrence.period_days for s in series)) + 1)
+        bounds = [start_time] + [m.end_time for m in added]
+        if self.exception_days:
+            bounds.append(self._at_hour(max(self.exception_days) + timedelta(days=1), 0))
+        for s in series:
+            bounds.append(s.start_time)
+            series_end = s.series_end()
+            if series_end is not None:
+                bounds.append(series_end)
+        periodic_from = max(bounds)
+        free_from = start_time
+        for busy_start, busy_end in busy:
+            if busy_start - free_from >= duration:
+                periodic_from = max(periodic_from, free_from)
+            free_from = max(free_from, busy_end)
+            while free_from - periodic_from > period:
+                # Разовые встречи нарушают периодичность: окно сдвигается за них.
+                meeting = next(iter(self._index.iter_from(periodic_from)), None)
+                if meeting is None or meeting.start_time >= free_from:
+                    raise ValueError(
+                        f"Нет свободного рабочего времени длительностью {duration}: "
+                        "повторяющиеся встречи занимают все рабочие часы."
+                    )
+                periodic_from = meeting.end_time
+            yield busy_start, busy_end
+
+    def _iter_busy_intervals(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime],
+        removed_ids: Collection[int] = (),
+        added: Sequence[Meeting] = ()
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        """Перебирает занятые интервалы (встречи и нерабочее время) в порядке начала.
+
+        Args:
+            start_time: Начало окна.
+            end_time: Конец окна (None — без ограничения).
+            removed_ids: ID встреч, которые считаются уже удалёнными.
+            added: Ещё не записанные встречи, упорядоченные по началу.
+
+        Returns:
+            Итератор по парам (начало, конец); интервалы могут пересекаться.
+        """
+        start_time, end_time = self._localize(start_time), self._localize(end_time)
+        one_offs = self._index.iter_from(start_time)
+        if removed_ids or added:
+            one_offs = heapq.merge(
+                (m for m in one_offs if m.id not in removed_ids),
+                (m for m in added if m.end_time > start_time),
+                key=attrgetter("start_minute")
+            )
+        meetings = heapq.merge(
+            one_offs,
+            self._iter_occurrences(start_time, end_time),
+            key=attrgetter("start_minute")
+        )
+        meetings = ((m.start_time, m.end_time) for m in meetings)
+        if end_time is not None:
+            meetings = takewhile(lambda interval: interval[0] < end_time, meetings)
+        return heapq.merge(self._iter_off_hours(start_time, end_time), meetings)
+
+    def _iter_off_hours(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime]
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        """Перебирает нерабочие интервалы по местным суткам (с учётом исключений), начиная с дня start_time."""
+        day = self._localize(start_time).date()
+        day_start = self._at_hour(day, 0)
+        while end_time is None or day_start < end_time:
+            next_day = day + timedelta(days=1)
+            next_day_start = self._at_hour(next_day, 0)
+            hours = self._day_hours(day)
+            if hours is not None:
+                yield day_start, self._at_hour(day, hours[0])
+                yield self._at_hour(day, hours[1]), next_day_start
+            else:
+                yield day_start, next_day_start
+            day, day_start = next_day, next_day_start
+
+    def _at_hour(self, day: date, hour: int) -> datetime:
+        """Возвращает момент, когда местные часы в дату day показывают hour:00 (hour до 24)."""
+        return datetime(day.year, day.month, day.day, tzinfo=self.tz) + timedelta(hours=hour)
 
     def get_conflicting_meetings(self, start_time: datetime, duration: timedelta) -> List[Meeting]:
         """Находит встречи, которые пересекаются с заданным временным интервалом.
@@ -218,14 +1577,15 @@ class Calendar:
             duration: Длительность интервала для проверки.
 
         Returns:
-            Список встреч, конфликтующих с указанным интервалом.
+            Список встреч (в том числе повторений серий), конфликтующих с указанным интервалом.
         """
-        conflicts = []
-        requested_end_time = start_time + duration
-        for meeting in self.meetings:
-            if start_time < meeting.end_time and meeting.start_time < requested_end_time:
-                conflicts.append(meeting)
-        return conflicts
+        start_time = self._localize(start_time)
+        end_time = _shift(start_time, duration)
+        return list(heapq.merge(
+            self._index.overlapping(start_time, end_time),
+            self._iter_occurrences(start_time, end_time),
+            key=attrgetter("start_minute")
+        ))
 
     def _next_working_time(self, time: datetime) -> datetime:
         """Находит следующее рабочее время, начиная с указанного момента.
@@ -235,33 +1595,168 @@ class Calendar:
 
         Returns:
             Объект datetime, представляющий начало следующего рабочего интервала.
+
+        Raises:
+            ValueError: Если рабочие дни не заданы.
         """
-        current = time
-        
-        if current.hour >= self.work_end_hour:
-            current = current.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        
-        if current.hour < self.work_start_hour:
-            current = current.replace(hour=self.work_start_hour, minute=0, second=0, microsecond=0)
-        
-        while current.weekday() not in self.working_days:
-             current = current.replace(hour=self.work_start_hour, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            
-        if current.hour < self.work_start_hour:
-             current = current.replace(hour=self.work_start_hour, minute=0, second=0, microsecond=0)
-             while current.weekday() not in self.working_days:
-                  current = current + timedelta(days=1)
-                  
-        return current
-
-    def get_state_string(self) -> str:
-        """Возвращает строковое представление текущего состояния календаря."""
-        if not self.meetings:
-            return "Календарь пуст."
-        
-        sorted_meetings = sorted(self.meetings, key=lambda m: m.start_time)        
-        meeting_lines = [str(m) for m in sorted_meetings]
-        return "\n\n\n".join(meeting_lines)
+        time = self._localize(time)
+        if self.exception_days:
+            return self._next_working_day_time(time)
+        if not self._working_mask:
+            raise ValueError("Не заданы рабочие дни.")
+        offset = self._next_working_offset[time.weekday() * 24 + time.hour]
+        if offset == 0:
+            return time
+        return time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=offset)
+
+    def _next_working_day_time(self, time: datetime) -> datetime:
+        """Ищет следующее рабочее время по дням с учётом исключений (O(1) на день)."""
+        day = time.date()
+        # После последнего исключения график снова недельный: достаточно ещё одной недели.
+        last_day = max(max(self.exception_days), day) + timedelta(days=7)
+        while day <= last_day:
+            hours = self._day_hours(day)
+            if hours is not None:
+                day_end = self._at_hour(day, hours[1])
+                if time < day_end:
+                    return max(time, self._at_hour(day, hours[0]))
+            day += timedelta(days=1)
+        raise ValueError("Не заданы рабочие дни.")
+
+    def get_state_string(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> str:
+        """Возвращает строковое представление текущего состояния календаря.
+
+        Результат последнего вызова кэшируется до следующего изменения встреч,
+        а тексты встреч — до их удаления, поэтому повторная отрисовка после
+        небольшого изменения не форматирует заново остальные встречи.
+
+        Args:
+            start_time: Начало интервала (None — без ограничения снизу).
+            end_time: Конец интервала (None — без ограничения сверху).
+        """
+        key = (self._version, start_time, end_time)
+        if self._state_cache is not None and self._state_cache[0] == key:
+            return self._state_cache[1]
+
+        if self._is_empty():
+            state = "Календарь пуст."
+        else:
+            meeting_lines = list(map(self._render, self.meetings_between(start_time, end_time)))
+            state = "\n\n\n".join(meeting_lines) if meeting_lines else "В указанном периоде встреч нет."
+        self._state_cache = (key, state)
+        return state
+
+
+def _iter_gaps(
+    busy: Iterable[Tuple[datetime, datetime]],
+    start_time: datetime,
+    end_time: Optional[datetime],
+    duration: timedelta
+) -> Iterator[Tuple[datetime, datetime]]:
+    """Вычисляет дополнение к занятым интервалам внутри окна.
+
+    Args:
+        busy: Занятые интервалы, упорядоченные по началу (могут пересекаться).
+        start_time: Начало окна.
+        end_time: Конец окна (None — без ограничения).
+        duration: Минимальная длительность возвращаемого промежутка.
+
+    Returns:
+        Итератор по свободным промежуткам (начало, конец) длиной не меньше duration.
+    """
+    free_from = start_time
+    for busy_start, busy_end in busy:
+        if end_time is not None and busy_start >= end_time:
+            break
+        if busy_start > free_from:
+            gap_end = busy_start if end_time is None else min(busy_start, end_time)
+            if gap_end - free_from >= duration:
+                yield free_from, gap_end
+        if busy_end > free_from:
+            free_from = busy_end
+        if end_time is not None and free_from >= end_time:
+            return
+    if end_time is not None and end_time - free_from >= duration:
+        yield free_from, end_time
+
+
+def find_common_free_slots(
+    calendars: Iterable[Calendar],
+    start_time: datetime,
+    end_time: datetime,
+    duration: timedelta,
+    limit: Optional[int] = None
+) -> List[Tuple[datetime, datetime]]:
+    """Находит промежутки, свободные и рабочие одновременно во всех календарях.
+
+    Занятые интервалы всех календарей сливаются одним k-путевым проходом,
+    поэтому время работы почти линейно по суммарному числу встреч в окне.
+    Наивные границы окна и найденные промежутки относятся к часовому поясу
+    первого календаря.
+
+    Args:
+        calendars: Календари участников.
+        start_time: Начало окна поиска.
+        end_time: Конец окна поиска (не включается).
+        duration: Требуемая длительность слота.
+        limit: Максимальное количество слотов (None — все слоты в окне).
+
+    Returns:
+        Список пар (начало, конец) общих свободных промежутков в хронологическом порядке.
+
+    Raises:
+        ValueError: Если одни календари заданы с часовым поясом, а другие без него.
+    """
+    calendars = list(calendars)
+    if len({calendar.tz is None for calendar in calendars}) > 1:
+        # Наивное время календаря без пояса нельзя однозначно сопоставить с абсолютным.
+        raise ValueError(
+            "Нельзя искать общее время для календарей с часовым поясом и без него: "
+            "задайте часовой пояс всем календарям."
+        )
+    localize = calendars[0]._localize if calendars else (lambda time: time)
+    start_time, end_time = localize(start_time), localize(end_time)
+    busy = heapq.merge(*(calendar._iter_busy_intervals(start_time, end_time) for calendar in calendars))
+    return [
+        (localize(slot_start), localize(slot_end))
+        for slot_start, slot_end in islice(_iter_gaps(busy, start_time, end_time, duration), limit)
+    ]
+
+
+class CalendarGroup:
+    """Набор календарей участников для поиска общего свободного времени."""
+    def __init__(self, calendars: Optional[Dict[str, Calendar]] = None):
+        """Инициализирует группу.
+
+        Args:
+            calendars: Словарь «участник -> календарь».
+        """
+        self.calendars: Dict[str, Calendar] = dict(calendars or {})
+
+    def add_calendar(self, participant: str, calendar: Calendar) -> None:
+        """Добавляет (или заменяет) календарь участника."""
+        self.calendars[participant] = calendar
+
+    def find_common_free_slots(
+        self,
+        participants: Iterable[str],
+        start_time: datetime,
+        end_time: datetime,
+        duration: timedelta,
+        limit: Optional[int] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Находит общие свободные промежутки для указанных участников.
+
+        Raises:
+            KeyError: Если календарь какого-либо участника не найден.
+            ValueError: Если одни календари заданы с часовым поясом, а другие без него.
+        """
+        participants = list(participants)
+        missing = [p for p in participants if p not in self.calendars]
+        if missing:
+            raise KeyError(f"Не найдены календари участников: {', '.join(missing)}")
+        calendars = [self.calendars[p] for p in participants]
+        return find_common_free_slots(calendars, start_time, end_time, duration, limit)
 
 
 class BaseCalendarTool(Tool):
@@ -299,12 +1794,17 @@ class AddMeetingTool(BaseCalendarTool):
             "type": "string",
             "description": "Приоритет встречи ('LOW', 'MEDIUM', или 'HIGH'). Агент должен определить подходящий приоритет на основе контекста встречи (тема, важность, участники). По умолчанию 'MEDIUM', если не указано.",
             "nullable": True
+        },
+        "displace": {
+            "type": "boolean",
+            "description": "Если True, пересекающиеся встречи с более низким приоритетом автоматически переносятся на ближайшие свободные слоты (повторяющиеся встречи не переносятся). По умолчанию False.",
+            "nullable": True
         }
     }
     output_type = "object"
     
     def forward(self, topic: str, organizer: str, duration: int, date: str, time: str, 
-               priority: Optional[str] = None) -> Dict[str, Any]:
+               priority: Optional[str] = None, displace: Optional[bool] = None) -> Dict[str, Any]:
         """Обрабатывает добавление встречи.
 
         Возвращает словарь с результатом операции, включая детали конфликтов, если они есть.
@@ -323,6 +1823,24 @@ class AddMeetingTool(BaseCalendarTool):
         except ValueError:
                 raise ValueError(f"Ошибка: Неверный формат даты '{date}' или времени '{time}'. Используйте 'ГГГГ-ММ-ДД' и 'ЧЧ:ММ'.")
 
+        if displace:
+            moves = self.calendar.add_meeting_displacing(topic, organizer, duration, start_time, priority_enum)
+            result["success"] = True
+            result["message"] = f"Встреча '{topic}' успешно добавлена"
+            if moves:
+                result["message"] += ". Перенесены: " + "; ".join(
+                    f"«{old.topic}» {old.start_time.strftime('%Y-%m-%d %H:%M')} → {new.start_time.strftime('%Y-%m-%d %H:%M')}"
+                    for old, new in moves
+                )
+            result["data"] = {
+                "id": self.calendar.next_id - 1,
+                "moved": [
+                    {"id": new.id, "topic": new.topic, "old_start": old.start_time.isoformat(), "new_start": new.start_time.isoformat()}
+                    for old, new in moves
+                ]
+            }
+            return result
+
         success = self.calendar.add_meeting(
             topic=topic,
             organizer=organizer,
@@ -339,16 +1857,7 @@ class AddMeetingTool(BaseCalendarTool):
             )
             next_slot = self.calendar.find_next_free_slot(start_time, timedelta(minutes=duration))
             
-            conflict_details = []
-            for meeting in conflicting_meetings:
-                conflict_details.append({
-                    "id": meeting.id,
-                    "topic": meeting.topic,
-                    "organizer": meeting.organizer,
-                    "start_time": meeting.start_time.isoformat(),
-                    "end_time": meeting.end_time.isoformat(),
-                    "priority": meeting.priority.name
-                })
+            conflict_details = [meeting.to_dict() for meeting in conflicting_meetings]
 
             conflict_topics = ', '.join([m['topic'] for m in conflict_details]) if conflict_details else 'Неизвестная встреча'
             raise ValueError(
@@ -359,6 +1868,97 @@ class AddMeetingTool(BaseCalendarTool):
         return result
 
 
+class AddRecurringMeetingTool(BaseCalendarTool):
+    name = "add_recurring_meeting"
+    description = "Добавляет в календарь повторяющуюся встречу (например, ежедневный стендап или еженедельную синхронизацию). Серия хранится одной записью."
+    inputs = {
+        "topic": {
+            "type": "string",
+            "description": "Тема/название встречи.",
+        },
+        "organizer": {
+            "type": "string",
+            "description": "Организатор встречи.",
+        },
+        "duration": {
+            "type": "integer",
+            "description": "Длительность каждого повторения в минутах.",
+        },
+        "date": {
+            "type": "string",
+            "description": "Дата первой встречи серии в формате 'ГГГГ-ММ-ДД'.",
+        },
+        "time": {
+            "type": "string",
+            "description": "Время начала встреч в формате 'ЧЧ:ММ'.",
+        },
+        "frequency": {
+            "type": "string",
+            "description": "Частота повторения: 'DAILY' (ежедневно) или 'WEEKLY' (еженедельно).",
+        },
+        "interval": {
+            "type": "integer",
+            "description": "Шаг повторения в днях (DAILY) или неделях (WEEKLY). По умолчанию 1.",
+            "nullable": True
+        },
+        "weekdays": {
+            "type": "array",
+            "items": {"type": "integer"},
+            "description": "Для WEEKLY: дни недели повторения (0=Понедельник, 6=Воскресенье). По умолчанию — день первой встречи.",
+            "nullable": True
+        },
+        "until": {
+            "type": "string",
+            "description": "Последняя дата повторений (включительно) в формате 'ГГГГ-ММ-ДД'. Необязательно.",
+            "nullable": True
+        },
+        "count": {
+            "type": "integer",
+            "description": "Общее количество повторений. Необязательно.",
+            "nullable": True
+        },
+        "priority": {
+            "type": "string",
+            "description": "Приоритет встречи ('LOW', 'MEDIUM', или 'HIGH'). По умолчанию 'MEDIUM'.",
+            "nullable": True
+        }
+    }
+    output_type = "object"
+
+    def forward(self, topic: str, organizer: str, duration: int, date: str, time: str, frequency: str,
+                interval: Optional[int] = None, weekdays: Optional[List[int]] = None, until: Optional[str] = None,
+                count: Optional[int] = None, priority: Optional[str] = None) -> Dict[str, Any]:
+        """Обрабатывает добавление серии повторяющихся встреч."""
+        result = {"success": False, "message": "", "data": None}
+
+        try:
+            try:
+                start_time = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+                until_date = datetime.strptime(until, "%Y-%m-%d").date() if until else None
+            except ValueError:
+                result["message"] = "Ошибка: Неверный формат даты или времени. Используйте 'ГГГГ-ММ-ДД' и 'ЧЧ:ММ'."
+                return result
+            try:
+                frequency_enum = Frequency[frequency.upper()]
+                priority_enum = Priority[priority.upper()] if priority else Priority.MEDIUM
+            except KeyError:
+                result["message"] = "Ошибка: Используйте частоту 'DAILY' или 'WEEKLY' и приоритет 'LOW', 'MEDIUM' или 'HIGH'."
+                return result
+
+            recurrence = Recurrence(frequency_enum, interval or 1, weekdays, until_date, count)
+            self.calendar.add_recurring_meeting(topic, organizer, duration, start_time, recurrence, priority_enum)
+            result["success"] = True
+            result["message"] = f"Повторяющаяся встреча '{topic}' успешно добавлена ({recurrence})"
+            result["data"] = {"id": self.calendar.next_id - 1, "recurrence": recurrence.to_dict()}
+
+        except ValueError as e:
+            result["message"] = str(e)
+        except Exception as e:
+            result["message"] = f"Произошла ошибка: {str(e)}"
+
+        return result
+
+
 class RemoveMeetingTool(BaseCalendarTool):
     name = "remove_meeting"
     description = "Удаляет встречу из календаря по её ID."
@@ -388,38 +1988,64 @@ class RemoveMeetingTool(BaseCalendarTool):
         return result
 
 
+class RemoveMeetingsTool(BaseCalendarTool):
+    name = "remove_meetings"
+    description = "Удаляет из календаря сразу несколько встреч по списку их ID."
+    inputs = {
+        "meeting_ids": {
+            "type": "array",
+            "items": {"type": "integer"},
+            "description": "Список ID встреч, которые нужно удалить.",
+        }
+    }
+    output_type = "object"
+
+    def forward(self, meeting_ids: List[int]) -> Dict[str, Any]:
+        """Обрабатывает удаление нескольких встреч."""
+        result = {"success": False, "message": "", "data": None}
+
+        try:
+            removed = self.calendar.remove_meetings(meeting_ids)
+            not_found = sorted(set(meeting_ids) - set(removed))
+            result["success"] = bool(removed)
+            result["message"] = f"Удалено встреч: {len(removed)}"
+            if not_found:
+                result["message"] += f". Не найдены: {', '.join(map(str, not_found))}"
+            result["data"] = {"removed": removed, "not_found": not_found}
+
+        except Exception as e:
+            result["message"] = f"Произошла ошибка: {str(e)}"
+
+        return result
+
+
 class ListMeetingsTool(BaseCalendarTool):
     name = "list_meetings"
-    description = "Выводит список всех встреч в календаре."
-    inputs = {}
+    description = "Выводит список встреч в календаре. Можно ограничить период датами, чтобы получить только нужные дни (например, текущую неделю)."
+    inputs = {
+        "start_date": {
+            "type": "string",
+            "description": "Первая дата периода в формате 'ГГГГ-ММ-ДД'. Необязательно (если не указано, период не ограничен снизу).",
+            "nullable": True
+        },
+        "end_date": {
+            "type": "string",
+            "description": "Последняя дата периода (включительно) в формате 'ГГГГ-ММ-ДД'. Необязательно (если не указано, период не ограничен сверху).",
+            "nullable": True
+        }
+    }
     output_type = "string"
     
-    def forward(self) -> Dict[str, Any]:
-        """Возвращает структурированный список всех встреч."""
+    def forward(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+        """Возвращает текстовый список встреч за указанный период."""
         try:
-            original_stdout = sys.stdout
-            meetings_output = io.StringIO()
-            sys.stdout = meetings_output
-            
-            self.calendar.list_meetings()            
-            sys.stdout = original_stdout
-            
-            meetings_data = []
-            if not self.calendar.meetings:
-                 message = "Календарь пуст."
-            else:
-                 message = "Встречи успешно получены."
-                 for meeting in self.calendar.meetings:
-                     meetings_data.append({
-                         "id": meeting.id,
-                         "topic": meeting.topic,
-                         "organizer": meeting.organizer,
-                         "duration": int(meeting.duration.total_seconds() // 60), 
-                         "start_time": meeting.start_time.isoformat(),
-                         "end_time": meeting.end_time.isoformat(),
-                         "priority": meeting.priority.name
-                     })
-            return meetings_output.getvalue().strip()
+            try:
+                start_time = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+                end_time = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+            except ValueError:
+                raise ValueError(f"Неверный формат даты '{start_date}' или '{end_date}'. Используйте 'ГГГГ-ММ-ДД'.")
+
+            return self.calendar.format_meetings(start_time, end_time)
         except Exception as e:
             raise ValueError(f"Произошла ошибка: {str(e)}")
 
@@ -471,6 +2097,134 @@ class FindFreeSlotTool(BaseCalendarTool):
         return result
 
 
+class FindFreeSlotsTool(BaseCalendarTool):
+    name = "find_free_slots"
+    description = "Находит все (или первые N) свободные промежутки рабочего времени в заданном диапазоне дат, в которые помещается встреча указанной длительности."
+    inputs = {
+        "duration": {
+            "type": "integer",
+            "description": "Требуемая длительность встречи в минутах.",
+        },
+        "start_date": {
+            "type": "string",
+            "description": "Первая дата диапазона поиска в формате 'ГГГГ-ММ-ДД'.",
+        },
+        "end_date": {
+            "type": "string",
+            "description": "Последняя дата диапазона поиска (включительно) в формате 'ГГГГ-ММ-ДД'.",
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Максимальное количество слотов в ответе. Необязательно (если не указано, возвращаются все слоты диапазона).",
+            "nullable": True
+        }
+    }
+    output_type = "object"
+
+    def forward(self, duration: int, start_date: str, end_date: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Обрабатывает поиск нескольких свободных слотов."""
+        result = {"success": False, "message": "", "data": None}
+
+        try:
+            try:
+                window_start = datetime.strptime(start_date, "%Y-%m-%d")
+                window_end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+            except ValueError:
+                 result["message"] = f"Ошибка: Неверный формат даты '{start_date}' или '{end_date}'. Используйте 'ГГГГ-ММ-ДД'."
+                 return result
+
+            slots = self.calendar.find_free_slots(window_start, window_end, timedelta(minutes=duration), limit)
+
+            result["success"] = True
+            if slots:
+                slot_lines = [f"{s.strftime('%Y-%m-%d %H:%M')}–{e.strftime('%H:%M')}" for s, e in slots]
+                result["message"] = f"Найдено свободных слотов: {len(slots)}. " + "; ".join(slot_lines)
+            else:
+                result["message"] = "В указанном диапазоне нет свободных слотов."
+            result["data"] = {
+                "free_slots": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in slots]
+            }
+
+        except ValueError as e:
+            result["message"] = f"Ошибка: {e}"
+        except Exception as e:
+            result["message"] = f"Произошла ошибка: {str(e)}"
+
+        return result
+
+
+class FindCommonFreeSlotsTool(BaseCalendarTool):
+    name = "find_common_free_slots"
+    description = "Находит свободные промежутки рабочего времени, общие для владельца календаря и указанных участников."
+    inputs = {
+        "participants": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Список участников (адреса электронной почты), чьё время нужно учесть.",
+        },
+        "duration": {
+            "type": "integer",
+            "description": "Требуемая длительность встречи в минутах.",
+        },
+        "start_date": {
+            "type": "string",
+            "description": "Первая дата диапазона поиска в формате 'ГГГГ-ММ-ДД'.",
+        },
+        "end_date": {
+            "type": "string",
+            "description": "Последняя дата диапазона поиска (включительно) в формате 'ГГГГ-ММ-ДД'.",
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Максимальное количество слотов в ответе. Необязательно (если не указано, возвращаются все слоты диапазона).",
+            "nullable": True
+        }
+    }
+    output_type = "object"
+
+    def __init__(self, calendar: Calendar, group: CalendarGroup):
+        super().__init__(calendar)
+        self.group = group
+
+    def forward(self, participants: List[str], duration: int, start_date: str, end_date: str,
+                limit: Optional[int] = None) -> Dict[str, Any]:
+        """Обрабатывает поиск общих свободных слотов."""
+        result = {"success": False, "message": "", "data": None}
+
+        try:
+            try:
+                window_start = datetime.strptime(start_date, "%Y-%m-%d")
+                window_end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+            except ValueError:
+                 result["message"] = f"Ошибка: Неверный формат даты '{start_date}' или '{end_date}'. Используйте 'ГГГГ-ММ-ДД'."
+                 return result
+
+            missing = [p for p in participants if p not in self.group.calendars]
+            if missing:
+                result["message"] = f"Ошибка: Не найдены календари участников: {', '.join(missing)}."
+                return result
+
+            calendars = [self.calendar] + [self.group.calendars[p] for p in participants]
+            slots = find_common_free_slots(calendars, window_start, window_end, timedelta(minutes=duration), limit)
+
+            result["success"] = True
+            if slots:
+                slot_lines = [f"{s.strftime('%Y-%m-%d %H:%M')}–{e.strftime('%H:%M')}" for s, e in slots]
+                result["message"] = f"Найдено общих свободных слотов: {len(slots)}. " + "; ".join(slot_lines)
+            else:
+                result["message"] = "В указанном диапазоне нет общего свободного времени."
+            result["data"] = {
+                "free_slots": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in slots]
+            }
+
+        except ValueError as e:
+            result["message"] = f"Ошибка: {e}"
+        except Exception as e:
+            result["message"] = f"Произошла ошибка: {str(e)}"
+
+        return result
+
+
 class IsTimeAvailableTool(BaseCalendarTool):
     name = "is_time_available"
     description = "Проверяет, доступен ли конкретный временной слот для встречи."
@@ -504,11 +2258,7 @@ class IsTimeAvailableTool(BaseCalendarTool):
             check_duration = timedelta(minutes=duration)
             check_end_time = check_start_time + check_duration
 
-            is_start_working = self.calendar.is_working_time(check_start_time)
-            end_of_workday = check_start_time.replace(hour=self.calendar.work_end_hour, minute=0, second=0, microsecond=0)
-            is_end_within_working = (check_start_time.date() == check_end_time.date() and check_end_time <= end_of_workday)
-
-            is_working_time_slot = is_start_working and is_end_within_working
+            is_working_time_slot = self.calendar.fits_working_time(check_start_time, check_duration)
 
             is_free = True
             conflicting_meetings = self.calendar.get_conflicting_meetings(check_start_time, check_duration)
@@ -638,17 +2388,28 @@ class GetCurrentDateTool(Tool):
 
 class CalendarToolset:
     """Предоставляет набор инструментов для работы с одним экземпляром календаря."""
-    def __init__(self, calendar: Calendar):
-        """Инициализирует набор инструментов с заданным календарем."""
+    def __init__(self, calendar: Calendar, group: Optional[CalendarGroup] = None):
+        """Инициализирует набор инструментов с заданным календарем.
+
+        Args:
+            calendar: Календарь владельца.
+            group: Календари коллег для поиска общего времени (необязательно).
+        """
         self.calendar = calendar
+        self.group = group
         self.tools = [
             AddMeetingTool(self.calendar),
+            AddRecurringMeetingTool(self.calendar),
             RemoveMeetingTool(self.calendar),
+            RemoveMeetingsTool(self.calendar),
             ListMeetingsTool(self.calendar),
             FindFreeSlotTool(self.calendar),
+            FindFreeSlotsTool(self.calendar),
             IsTimeAvailableTool(self.calendar),
             GetCurrentDateTool(self.calendar)
         ]
+        if self.group is not None:
+            self.tools.append(FindCommonFreeSlotsTool(self.calendar, self.group))
     
     def get_tools(self) -> List[Tool]:
         """Возвращает список доступных инструментов календаря."""
@@ -0,0 +1,391 @@
+"""Полнотекстовый поиск по письмам: инвертированный индекс и ранжирование BM25.
+
+Индекс инкрементальный: документы добавляются и удаляются по одному.
+Постинги сгруппированы по верхней границе вклада в оценку, чтобы поиск
+top-k не перебирал все документы с частыми термами. Токенизация
+учитывает русский язык: регистр и «ё» нормализуются, частые служебные
+слова отбрасываются, кириллические слова приводятся к основе стеммером
+Snowball для русского языка.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import accumulate, filterfalse
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from tools.snapshot_format import SnapshotReader, SnapshotWriter
+
+_WORD = re.compile(r"\w+")
+_CYRILLIC = re.compile(r"[а-я]")
+_LENGTH_CLASSES_PER_OCTAVE = 4
+
+_STOP_WORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по "
+    "только ее мне было вот от меня еще нет о из ему теперь когда даже ну ли если уже "
+    "или ни быть был него до вас нибудь опять уж вам ведь там потом себя ничего ей "
+    "может они тут где есть надо ней для мы тебя их чем была сам чтоб без будто чего "
+    "раз тоже себе под будет ж тогда кто этот того потому этого какой совсем ним здесь "
+    "этом один почти мой тем чтобы нее были куда зачем всех никогда можно при наконец "
+    "два об другой хоть после над больше тот через эти нас про всего них какая много "
+    "разве три эту моя впрочем хорошо свою этой перед иногда лучше чуть том нельзя "
+    "такой им более всегда конечно всю между "
+    "the a an and or of to in on for is are was be it this that with as at by from"
+    .split()
+)
+
+_VOWELS = frozenset("аеиоуыэюя")
+
+# Классы окончаний стеммера Snowball для русского языка. Окончания из групп
+# «после а/я» отсекаются, только если перед ними стоит «а» или «я» (сама буква остаётся).
+_PERFECTIVE_GERUND_AFTER_A = frozenset("в вши вшись".split())
+_PERFECTIVE_GERUND = frozenset("ив ивши ившись ыв ывши ывшись".split())
+_REFLEXIVE = frozenset("ся сь".split())
+_ADJECTIVE = frozenset("ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею".split())
+_PARTICIPLE_AFTER_A = frozenset("ем нн вш ющ щ".split())
+_PARTICIPLE = frozenset("ивш ывш ующ".split())
+_VERB_AFTER_A = frozenset("ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно".split())
+_VERB = frozenset(
+    "ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены ить ыть ишь ую ю".split()
+)
+_NOUN = frozenset(
+    "а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь ию ью ю ия ья я".split()
+)
+_SUPERLATIVE = frozenset("ейш ейше".split())
+_DERIVATIONAL = frozenset("ост ость".split())
+_EMPTY: frozenset = frozenset()
+
+
+def _regions(word: str) -> Tuple[int, int]:
+    """Начала областей RV и R2 (индексы в слове) по определению Snowball."""
+    def after_vowel_consonant(start: int) -> int:
+        i = start
+        while i < len(word) and word[i] not in _VOWELS:
+            i += 1
+        while i < len(word) and word[i] in _VOWELS:
+            i += 1
+        return min(i + 1, len(word))
+
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in _VOWELS:
+            rv = i + 1
+            break
+    r1 = after_vowel_consonant(0)
+    return rv, after_vowel_consonant(r1)
+
+
+def _longest_ending(word: str, limit: int, endings: frozenset) -> str:
+    """Самое длинное окончание из `endings`, целиком лежащее в области, начинающейся с `limit`."""
+    for length in range(min(6, len(word) - limit), 0, -1):
+        if word[-length:] in endings:
+            return word[-length:]
+    return ""
+
+
+def _remove_ending(word: str, limit: int, after_a: frozenset, plain: frozenset) -> Optional[str]:
+    """Отсекает самое длинное окончание класса или возвращает None.
+
+    Как и в Snowball, при неподходящем самом длинном окончании (нет «а»/«я»
+    перед окончанием из группы `after_a`) более короткие не пробуются.
+    """
+    ending = _longest_ending(word, limit, after_a | plain)
+    if not ending:
+        return None
+    if ending in after_a:
+        position = len(word) - len(ending) - 1
+        if position < limit or word[position] not in "ая":
+            return None
+    return word[:-len(ending)]
+
+
+@lru_cache(maxsize=1 << 18)
+def stem(word: str) -> str:
+    """Приводит русское слово к основе по алгоритму Snowball (Porter для русского).
+
+    Слово ожидается в нижнем регистре с «ё», заменённой на «е».
+    Некириллические слова (латиница, числа, части адресов) не изменяются.
+    """
+    if not _CYRILLIC.search(word):
+        return word
+    rv, r2 = _regions(word)
+
+    # Шаг 1: деепричастие; иначе возвратная частица, затем прилагательное
+    # (возможно, с суффиксом причастия), глагол или существительное.
+    result = _remove_ending(word, rv, _PERFECTIVE_GERUND_AFTER_A, _PERFECTIVE_GERUND)
+    if result is None:
+        result = _remove_ending(word, rv, _EMPTY, _REFLEXIVE) or word
+        adjective = _remove_ending(result, rv, _EMPTY, _ADJECTIVE)
+        if adjective is not None:
+            result = _remove_ending(adjective, rv, _PARTICIPLE_AFTER_A, _PARTICIPLE) or adjective
+        else:
+            result = (
+                _remove_ending(result, rv, _VERB_AFTER_A, _VERB)
+                or _remove_ending(result, rv, _EMPTY, _NOUN)
+                or result
+            )
+    word = result
+
+    # Шаг 2: конечное «и».
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2.
+    ending = _longest_ending(word, r2, _DERIVATIONAL)
+    if ending:
+        word = word[:-len(ending)]
+
+    # Шаг 4: превосходная степень, двойное «н», мягкий знак.
+    ending = _longest_ending(word, rv, _SUPERLATIVE | {"н", "ь"})
+    if ending in _SUPERLATIVE:
+        word = word[:-len(ending)]
+        if word.endswith("нн") and len(word) - 2 >= rv:
+            word = word[:-1]
+    elif ending == "н":
+        if word.endswith("нн") and len(word) - 2 >= rv:
+            word = word[:-1]
+    elif ending == "ь":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на нормализованные термы.
+
+    Args:
+        text: Исходный текст (тема, тело письма, адрес).
+
+    Returns:
+        Список термов в порядке появления (с повторами).
+    """
+    words = _WORD.findall(text.lower().replace("ё", "е"))
+    return list(map(stem, filterfalse(_STOP_WORDS.__contains__, words)))
+
+
+def _length_class(length: int) -> int:
+    """Класс длины документа: четверть октавы (длины внутри класса различаются менее чем на 19%)."""
+    return int(math.log2(length) * _LENGTH_CLASSES_PER_OCTAVE)
+
+
+def _class_min_length(length_class: int) -> float:
+    """Нижняя граница длины документов класса (с запасом на погрешность log2)."""
+    return 2 ** (length_class / _LENGTH_CLASSES_PER_OCTAVE) * (1 - 1e-9)
+
+
+class SearchIndex:
+    """Инкрементальный инвертированный индекс с ранжированием BM25.
+
+    Постинги терма разбиты на сегменты по (частоте терма, классу длины
+    документа). Для сегмента оценка BM25 ограничена сверху значением при
+    его частоте и минимальной длине класса, поэтому поиск может читать
+    сегменты от самых «весомых» и останавливаться, как только
+    оставшиеся документы заведомо не попадут в top-k (алгоритм Fagin's
+    threshold). Результат совпадает с полным перебором.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """Инициализирует пустой индекс.
+
+        Args:
+            k1: Параметр насыщения частоты терма.
+            b: Степень нормализации по длине документа.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Tuple[int, int], Dict[str, None]]] = defaultdict(dict)
+        self._doc_freqs: Dict[str, int] = defaultdict(int)
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id: str, fields: Iterable[Tuple[str, int]]) -> None:
+        """Индексирует документ (заменяя прежнюю версию с тем же ID).
+
+        Args:
+            doc_id: ID документа.
+            fields: Пары (текст поля, вес); вес умножает частоты термов поля.
+        """
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+        terms: List[str] = []
+        for text, weight in fields:
+            terms += tokenize(text) * weight
+        counts = Counter(terms)
+        length = len(terms)
+        length_class = _length_class(length) if length else 0
+        postings, doc_freqs = self._postings, self._doc_freqs
+        for term, count in counts.items():
+            segment = postings[term].get((count, length_class))
+            if segment is None:
+                segment = postings[term][(count, length_class)] = {}
+            segment[doc_id] = None
+            doc_freqs[term] += 1
+        self._doc_terms[doc_id] = counts
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> bool:
+        """Удаляет документ из индекса.
+
+        Returns:
+            True, если документ был в индексе.
+        """
+        counts = self._doc_terms.pop(doc_id, None)
+        if counts is None:
+            return False
+        length = self._doc_lengths.pop(doc_id)
+        length_class = _length_class(length) if length else 0
+        postings, doc_freqs = self._postings, self._doc_freqs
+        for term, count in counts.items():
+            segments = postings[term]
+            segment = segments[(count, length_class)]
+            del segment[doc_id]
+            if not segment:
+                del segments[(count, length_class)]
+            doc_freqs[term] -= 1
+            if not doc_freqs[term]:
+                del postings[term], doc_freqs[term]
+        self._total_length -= length
+        return True
+
+    def write_snapshot(self, writer: SnapshotWriter, positions: Mapping[str, int]) -> None:
+        """Дописывает состояние индекса в снимок колонками.
+
+        Частоты термов пишутся дважды: по документам (для подсчёта оценок)
+        и по сегментам постингов, чтобы восстановление не токенизировало
+        тексты заново и собирало словари целыми срезами колонок.
+
+        Args:
+            writer: Снимок, в который дописываются колонки.
+            positions: Номер каждого документа индекса в снимке владельца.
+        """
+        terms = list(self._postings)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        doc_terms = self._doc_terms
+        writer.add_json({"k1": self.k1, "b": self.b})
+        writer.add_strings(terms)
+        writer.add_ints([positions[doc_id] for doc_id in self._doc_lengths], "I")
+        writer.add_ints(list(self._doc_lengths.values()), "I")
+        writer.add_ints([len(doc_terms[doc_id]) for doc_id in self._doc_lengths], "I")
+        writer.add_ints([term_ids[term] for doc_id in self._doc_lengths for term in doc_terms[doc_id]], "I")
+        writer.add_ints([count for doc_id in self._doc_lengths for count in doc_terms[doc_id].values()], "I")
+        segments = self._postings.values()
+        writer.add_ints([len(term_segments) for term_segments in segments], "I")
+        writer.add_ints([tf for term_segments in segments for tf, _ in term_segments], "I")
+        writer.add_ints([length_class for term_segments in segments for _, length_class in term_segments], "I")
+        writer.add_ints([len(docs) for term_segments in segments for docs in term_segments.values()], "I")
+        writer.add_ints([
+            positions[doc_id]
+            for term_segments in segments for docs in term_segments.values() for doc_id in docs
+        ], "I")
+
+    @classmethod
+    def read_snapshot(cls, reader: SnapshotReader, doc_ids: Sequence[str]) -> "SearchIndex":
+        """Восстанавливает индекс из колонок, записанных `write_snapshot`.
+
+        Args:
+            reader: Снимок, из которого читаются колонки.
+            doc_ids: ID документов по их номерам в снимке владельца.
+
+        Returns:
+            Индекс в том же состоянии, что и при записи.
+        """
+        index = cls(**reader.read_json())
+        terms = reader.read_strings()
+        positions, lengths, sizes, term_ids, counts = (reader.read_ints() for _ in range(5))
+        docs = list(map(doc_ids.__getitem__, positions))
+        flat_terms = list(map(terms.__getitem__, term_ids))
+        index._doc_terms = {
+            doc_id: dict(zip(flat_terms[end - size:end], counts[end - size:end]))
+            for doc_id, size, end in zip(docs, sizes, accumulate(sizes))
+        }
+        index._doc_lengths = dict(zip(docs, lengths))
+        index._total_length = sum(lengths)
+
+        segment_counts, tfs, length_classes, segment_sizes, segment_docs = (reader.read_ints() for _ in range(5))
+        segment_doc_ids = list(map(doc_ids.__getitem__, segment_docs))
+        keys = list(zip(tfs, length_classes))
+        segments = [
+            dict.fromkeys(segment_doc_ids[end - size:end])
+            for size, end in zip(segment_sizes, accumulate(segment_sizes))
+        ]
+        for term, count, end in zip(terms, segment_counts, accumulate(segment_counts)):
+            index._postings[term] = dict(zip(keys[end - count:end], segments[end - count:end]))
+            index._doc_freqs[term] = sum(segment_sizes[end - count:end])
+        return index
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Ищет документы по запросу и ранжирует их по BM25.
+
+        Документ попадает в выдачу, если содержит хотя бы один терм запроса.
+
+        Args:
+            query: Текст запроса.
+            limit: Максимальное число результатов.
+
+        Returns:
+            Пары (ID документа, оценка) по убыванию оценки.
+        """
+        n_docs = len(self._doc_lengths)
+        if not n_docs or limit <= 0:
+            return []
+        k1, b = self.k1, self.b
+        norm = k1 * (1 - b)
+        scale = k1 * b * n_docs / self._total_length
+
+        weights: Dict[str, float] = {}
+        streams = []  # для каждого терма: сегменты по убыванию верхней границы оценки
+        for term in dict.fromkeys(tokenize(query)):
+            df = self._doc_freqs.get(term)
+            if not df:
+                continue
+            idf = weights[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (k1 + 1)
+            segments = sorted(
+                (
+                    (idf * tf / (tf + norm + scale * _class_min_length(length_class)), docs)
+                    for (tf, length_class), docs in self._postings[term].items()
+                ),
+                key=lambda segment: segment[0],
+                reverse=True,
+            )
+            streams.append(segments)
+        positions = [0] * len(streams)
+
+        doc_terms, lengths = self._doc_terms, self._doc_lengths
+        top: List[Tuple[float, str]] = []  # min-куча лучших документов
+        seen = set()
+        while True:
+            bounds = [
+                stream[position][0] if position < len(stream) else 0.0
+                for stream, position in zip(streams, positions)
+            ]
+            threshold = sum(bounds)
+            if not threshold or (len(top) == limit and top[0][0] >= threshold):
+                break
+            i = max(range(len(streams)), key=bounds.__getitem__)
+            docs = streams[i][positions[i]][1]
+            positions[i] += 1
+            for doc_id in docs:
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                counts = doc_terms[doc_id]
+                denominator = norm + scale * lengths[doc_id]
+                score = 0.0
+                for term, weight in weights.items():
+                    tf = counts.get(term)
+                    if tf:
+                        score += weight * tf / (tf + denominator)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, doc_id))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, doc_id))
+        top.sort(reverse=True)
+        return [(doc_id, score) for score, doc_id in top]
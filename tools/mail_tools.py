@@ -1,11 +1,31 @@
+import base64
+import heapq
+import json
 import uuid
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple, Any
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, repeat
+from typing import Dict, Iterable, List, Optional, Tuple, Any
 
 from deep_translator import GoogleTranslator  
 from gigasmol import GigaChatSmolModel
 from smolagents import Tool
 
+from tools.mail_search import SearchIndex
+from tools.snapshot_format import SnapshotReader, SnapshotWriter, paused_gc
+from tools.thread_budget import render_thread, truncate_to_tokens
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_NAIVE_OFFSET = -(2 ** 31)  # метка наивного времени в колонке смещений
+_SNAPSHOT_MAGIC = b"MBXS"
+_SNAPSHOT_VERSION = 2  # версия 2: колонки полнотекстового индекса
+_INSORT_LIMIT = 64  # больше новых записей — дешевле досортировать список целиком
+_THREAD_SORTS = ("activity", "size", "subject")
+_THREAD_PROMPT_TOKENS = 6000  # бюджет на текст переписки в одном запросе к GigaChat
+
 
 class Email:
     def __init__(
@@ -34,20 +54,219 @@ class Email:
         )
 
 
+def _address_key(address: str) -> str:
+    """Нормализованный адрес для индексов отправителей и получателей."""
+    return address.strip().lower()
+
+
+def _timestamp_key(timestamp: datetime) -> int:
+    """Время в микросекундах от эпохи UTC; наивное время считается временем UTC."""
+    return (timestamp - (_EPOCH if timestamp.tzinfo is None else _EPOCH_UTC)) // _MICROSECOND
+
+
+def _insert_sorted(items: List[Tuple], entries: List[Tuple]) -> List[Tuple]:
+    """Вставить записи в отсортированный список; возвращает итоговый список."""
+    if len(entries) <= _INSORT_LIMIT:
+        for entry in entries:
+            insort(items, entry)
+        return items
+    # Timsort сливает уже отсортированный список с новым хвостом почти за линейное время.
+    items += entries
+    items.sort()
+    return items
+
+
+def _remove_sorted(items: List[Tuple], entries: List[Tuple]) -> List[Tuple]:
+    """Убрать записи из отсортированного списка; возвращает итоговый список."""
+    if len(entries) <= _INSORT_LIMIT:
+        for entry in entries:
+            i = bisect_left(items, entry)
+            if i < len(items) and items[i] == entry:
+                del items[i]
+        return items
+    dropped = set(entries)
+    return [entry for entry in items if entry not in dropped]
+
+
+def _encode_cursor(sort: str, key: Tuple) -> str:
+    """Упаковать ключ последнего потока страницы в непрозрачный курсор."""
+    return base64.urlsafe_b64encode(json.dumps([sort, *key], ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort: str) -> Tuple:
+    """Распаковать курсор, проверив, что он выдан для той же сортировки."""
+    try:
+        cursor_sort, *key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError(f"Некорректный курсор '{cursor}'.")
+    if cursor_sort != sort or len(key) != 2:
+        raise ValueError(f"Курсор '{cursor}' выдан для другой сортировки.")
+    return tuple(key)
+
+
+def _search_fields(email: Email) -> List[Tuple[str, int]]:
+    """Поля письма для полнотекстового индекса с весами (тема весит вдвое больше)."""
+    return [(email.subject, 2), (email.body, 1), (email.sender, 1), (" ".join(email.recipients), 1)]
+
+
 class Mailbox:
     """Упрощённая «база данных» писем + индекс потоков."""
 
     def __init__(self):
         self._emails: Dict[str, Email] = {}
-        self._threads: Dict[str, List[str]] = {}
+        # Поток — упорядоченное множество ID писем (dict со значениями None):
+        # порядок добавления сохраняется, проверка и удаление — за O(1).
+        self._threads: Dict[str, Dict[str, None]] = {}
+        # Полнотекстовый индекс поддерживается при каждом добавлении и удалении письма.
+        self._search = SearchIndex()
+        # Вторичные индексы: адрес -> упорядоченное множество ID писем и
+        # отсортированный список (микросекунды UTC, ID письма) для диапазонов по времени.
+        self._by_sender: Dict[str, Dict[str, None]] = {}
+        self._by_recipient: Dict[str, Dict[str, None]] = {}
+        self._by_time: List[Tuple[int, str]] = []
+        # Последняя активность потока (время самого позднего письма, микросекунды UTC)
+        # и потоки, отсортированные по ней от новых к старым: (-время, ID потока).
+        self._thread_activity: Dict[str, int] = {}
+        self._threads_by_activity: List[Tuple[int, str]] = []
+        # Кэш отрисовки: версия потока растёт при каждом его изменении,
+        # готовый текст потока действителен, пока версия совпадает.
+        # Тексты отдельных писем переиспользуются до замены или удаления письма.
+        self._thread_versions: Dict[str, int] = {}
+        self._thread_renders: Dict[str, Tuple[int, str, List[str]]] = {}
+        self._rendered_emails: Dict[str, str] = {}
 
     def add_email(self, email: Email) -> None:
         """Добавить письмо (или обновить, если ID совпадает)."""
-        self._emails[email.email_id] = email
-        if email.thread_id not in self._threads:
-            self._threads[email.thread_id] = []
-        if email.email_id not in self._threads[email.thread_id]:
-            self._threads[email.thread_id].append(email.email_id)
+        self.add_emails((email,))
+
+    def add_emails(self, emails: Iterable[Email]) -> None:
+        """Добавить пачку писем (например, при импорте).
+
+        Письма с уже существующим ID обновляются на месте; если у обновлённого
+        письма сменился поток, оно переносится в новый поток.
+
+        Args:
+            emails: Письма в порядке добавления.
+        """
+        known, threads, search = self._emails, self._threads, self._search
+        added: Dict[str, Email] = {}
+        replaced: List[Email] = []
+        touched: Dict[str, None] = {}
+        latest: Dict[str, int] = {}
+        for email in emails:
+            previous = known.get(email.email_id)
+            if previous is not None:
+                if previous.thread_id != email.thread_id:
+                    self._discard_from_thread(previous.thread_id, email.email_id)
+                self._unindex_addresses(previous)
+                self._rendered_emails.pop(email.email_id, None)
+                touched[previous.thread_id] = None
+                if email.email_id not in added:
+                    replaced.append(previous)
+            known[email.email_id] = email
+            added[email.email_id] = email
+            self._index_addresses(email)
+            thread = threads.get(email.thread_id)
+            if thread is None:
+                thread = threads[email.thread_id] = {}
+            thread[email.email_id] = None
+            self._touch_thread(email.thread_id)
+            search.add(email.email_id, _search_fields(email))
+            key = _timestamp_key(email.timestamp)
+            if key > latest.get(email.thread_id, key - 1):
+                latest[email.thread_id] = key
+        self._unindex_times(replaced)
+        self._index_times(added.values())
+        self._update_activity(touched, latest)
+
+    def _discard_from_thread(self, thread_id: str, email_id: str) -> None:
+        """Убрать письмо из потока; опустевший поток удаляется."""
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            return
+        thread.pop(email_id, None)
+        if thread:
+            self._touch_thread(thread_id)
+        else:
+            self._drop_thread(thread_id)
+
+    def _touch_thread(self, thread_id: str) -> None:
+        """Отметить изменение потока: увеличить его версию и сбросить отрисовку."""
+        self._thread_versions[thread_id] = self._thread_versions.get(thread_id, 0) + 1
+        self._thread_renders.pop(thread_id, None)
+
+    def _drop_thread(self, thread_id: str) -> None:
+        """Удалить поток вместе с его версией и отрисовкой."""
+        del self._threads[thread_id]
+        self._thread_versions.pop(thread_id, None)
+        self._thread_renders.pop(thread_id, None)
+
+    def _index_addresses(self, email: Email) -> None:
+        """Добавить письмо в индексы отправителей и получателей."""
+        for index, addresses in ((self._by_sender, (email.sender,)), (self._by_recipient, email.recipients)):
+            for address in addresses:
+                key = _address_key(address)
+                email_ids = index.get(key)
+                if email_ids is None:
+                    email_ids = index[key] = {}
+                email_ids[email.email_id] = None
+
+    def _unindex_addresses(self, email: Email) -> None:
+        """Убрать письмо из индексов отправителей и получателей."""
+        for index, addresses in ((self._by_sender, (email.sender,)), (self._by_recipient, email.recipients)):
+            for address in addresses:
+                key = _address_key(address)
+                email_ids = index.get(key)
+                if email_ids is None:
+                    continue
+                email_ids.pop(email.email_id, None)
+                if not email_ids:
+                    del index[key]
+
+    def _index_times(self, emails: Iterable[Email]) -> None:
+        """Добавить письма в отсортированный индекс по времени."""
+        entries = [(_timestamp_key(email.timestamp), email.email_id) for email in emails]
+        self._by_time = _insert_sorted(self._by_time, entries)
+
+    def _unindex_times(self, emails: List[Email]) -> None:
+        """Убрать письма из индекса по времени."""
+        entries = [(_timestamp_key(email.timestamp), email.email_id) for email in emails]
+        self._by_time = _remove_sorted(self._by_time, entries)
+
+    def _update_activity(self, recompute: Iterable[str], latest: Dict[str, int]) -> None:
+        """Обновить последнюю активность потоков и их отсортированный индекс.
+
+        Args:
+            recompute: Потоки, из которых письма удалялись или заменялись:
+                их активность пересчитывается по всем письмам.
+            latest: Для остальных потоков — самое позднее время новых писем.
+        """
+        activity = self._thread_activity
+        recompute = dict.fromkeys(recompute)
+        changes: Dict[str, Optional[int]] = {}
+        for thread_id in recompute:
+            email_ids = self._threads.get(thread_id)
+            changes[thread_id] = max(
+                _timestamp_key(self._emails[email_id].timestamp) for email_id in email_ids
+            ) if email_ids else None
+        for thread_id, key in latest.items():
+            if thread_id not in recompute:
+                current = activity.get(thread_id)
+                if current is None or key > current:
+                    changes[thread_id] = key
+        stale, fresh = [], []
+        for thread_id, key in changes.items():
+            current = activity.get(thread_id)
+            if current == key:
+                continue
+            if current is not None:
+                stale.append((-current, thread_id))
+            if key is None:
+                del activity[thread_id]
+            else:
+                activity[thread_id] = key
+                fresh.append((-key, thread_id))
+        self._threads_by_activity = _insert_sorted(_remove_sorted(self._threads_by_activity, stale), fresh)
 
     def get_email(self, email_id: str) -> Optional[Email]:
         """Найти письмо по ID."""
@@ -55,29 +274,156 @@ class Mailbox:
 
     def get_thread_emails(self, thread_id: str) -> List[Email]:
         """Вернуть список писем в данном потоке, по порядку добавления."""
-        email_ids = self._threads.get(thread_id, [])
+        email_ids = self._threads.get(thread_id, ())
         return [self._emails[eid] for eid in email_ids]
     
     def get_thread_emails_as_string(self, thread_id: str) -> Tuple[str, List[str]]:
-        """Вернуть список писем в данном потоке, по порядку добавления."""
-        emails = self.get_thread_emails(thread_id)
-        string_emails = "\n\n".join([f"Письмо ({i+1}) {str(email)}" for i, email in enumerate(emails)])
-        list_emails = [f"Письмо ({i+1}) {str(email)}" for i, email in enumerate(emails)]
-        return string_emails, list_emails
+        """Вернуть список писем в данном потоке, по порядку добавления.
+
+        Каждое письмо форматируется один раз; текст потока кэшируется до его
+        следующего изменения (см. `_touch_thread`).
+        """
+        version = self._thread_versions.get(thread_id, 0)
+        cached = self._thread_renders.get(thread_id)
+        if cached is None or cached[0] != version:
+            rendered = self._rendered_emails
+            list_emails = []
+            for i, email_id in enumerate(self._threads.get(thread_id, ()), 1):
+                text = rendered.get(email_id)
+                if text is None:
+                    text = rendered[email_id] = str(self._emails[email_id])
+                list_emails.append(f"Письмо ({i}) {text}")
+            cached = (version, "\n\n".join(list_emails), list_emails)
+            if list_emails:
+                self._thread_renders[thread_id] = cached
+        return cached[1], list(cached[2])
 
     def delete_email(self, email_id: str) -> bool:
         """Удалить письмо по email_id. Если поток опустел, удалить и поток."""
-        email_obj = self._emails.pop(email_id, None)
-        if not email_obj:
-            return False
-        
-        thread_id = email_obj.thread_id
-        if thread_id in self._threads:
-            self._threads[thread_id] = [eid for eid in self._threads[thread_id] if eid != email_id]
-            if not self._threads[thread_id]:
-                del self._threads[thread_id]
-        return True
+        return self.delete_emails((email_id,)) == 1
+
+    def delete_emails(self, email_ids: Iterable[str]) -> int:
+        """Удалить пачку писем по ID (например, для задач очистки архива).
+
+        Неизвестные ID пропускаются; опустевшие потоки удаляются.
+
+        Args:
+            email_ids: ID удаляемых писем.
+
+        Returns:
+            Количество удалённых писем.
+        """
+        known, search, activity = self._emails, self._search, self._thread_activity
+        deleted: List[Email] = []
+        touched: Dict[str, None] = {}
+        for email_id in email_ids:
+            email_obj = known.pop(email_id, None)
+            if email_obj is None:
+                continue
+            deleted.append(email_obj)
+            self._rendered_emails.pop(email_id, None)
+            # Активность потока меняется, только если удалено его самое позднее письмо (или поток опустел).
+            if activity.get(email_obj.thread_id) == _timestamp_key(email_obj.timestamp):
+                touched[email_obj.thread_id] = None
+            self._discard_from_thread(email_obj.thread_id, email_id)
+            self._unindex_addresses(email_obj)
+            search.remove(email_id)
+        self._unindex_times(deleted)
+        self._update_activity(touched, {})
+        return len(deleted)
+
+    def delete_thread(self, thread_id: str) -> int:
+        """Удалить поток вместе со всеми его письмами.
+
+        Args:
+            thread_id: ID потока.
+
+        Returns:
+            Количество удалённых писем (0, если потока нет).
+        """
+        email_ids = self._threads.pop(thread_id, None)
+        if not email_ids:
+            return 0
+        self._thread_versions.pop(thread_id, None)
+        self._thread_renders.pop(thread_id, None)
+        deleted = [self._emails.pop(email_id) for email_id in email_ids]
+        for email_obj in deleted:
+            self._rendered_emails.pop(email_obj.email_id, None)
+            self._unindex_addresses(email_obj)
+            self._search.remove(email_obj.email_id)
+        self._unindex_times(deleted)
+        self._update_activity((thread_id,), {})
+        return len(deleted)
+
+    def search_emails(self, query: str, limit: int = 10) -> List[Tuple[Email, float]]:
+        """Полнотекстовый поиск по теме, телу, отправителю и получателям (BM25).
+
+        Args:
+            query: Текст запроса.
+            limit: Максимальное число результатов.
+
+        Returns:
+            Пары (письмо, оценка релевантности) по убыванию оценки.
+        """
+        return [(self._emails[email_id], score) for email_id, score in self._search.search(query, limit)]
     
+    def find_emails(
+        self,
+        sender: Optional[str] = None,
+        recipient: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[Email]:
+        """Выбрать письма по отправителю, получателю и интервалу времени без полного перебора.
+
+        Перебирается самый узкий из заданных индексов, остальные условия
+        проверяются для его записей. Наивное время считается временем UTC.
+
+        Args:
+            sender: Адрес отправителя (без учёта регистра).
+            recipient: Адрес получателя (без учёта регистра).
+            since: Начало интервала (включительно).
+            until: Конец интервала (не включительно).
+            limit: Максимальное число писем.
+
+        Returns:
+            Письма от новых к старым.
+        """
+        by_time = self._by_time
+        low = bisect_left(by_time, (_timestamp_key(since),)) if since is not None else 0
+        high = bisect_left(by_time, (_timestamp_key(until),)) if until is not None else len(by_time)
+        address_sets = [
+            index.get(_address_key(address), {})
+            for index, address in ((self._by_sender, sender), (self._by_recipient, recipient))
+            if address is not None
+        ]
+        address_sets.sort(key=len)
+        if limit is None:
+            limit = len(self._emails)
+        if limit <= 0 or low >= high:
+            return []
+
+        if not address_sets or high - low <= len(address_sets[0]):
+            email_ids = []
+            for i in range(high - 1, low - 1, -1):
+                email_id = by_time[i][1]
+                if all(email_id in email_set for email_set in address_sets):
+                    email_ids.append(email_id)
+                    if len(email_ids) == limit:
+                        break
+        else:
+            narrowest, others = address_sets[0], address_sets[1:]
+            low_key, high_key = by_time[low][0], by_time[high - 1][0]
+            entries = []
+            for email_id in narrowest:
+                key = _timestamp_key(self._emails[email_id].timestamp)
+                if low_key <= key <= high_key and all(email_id in email_set for email_set in others):
+                    entries.append((key, email_id))
+            entries.sort(reverse=True)
+            email_ids = [email_id for _, email_id in entries[:limit]]
+        return [self._emails[email_id] for email_id in email_ids]
+
     def list_threads_with_subjects(self) -> List[Dict[str, str]]:
         """Возвращает список словарей: [{thread_id, subject}, ...]"""
         results = []
@@ -89,24 +435,182 @@ class Mailbox:
             })
         return results
     
+    def _thread_sort_key(self, sort: str, thread_id: str) -> Tuple:
+        """Ключ сортировки потока: по возрастанию ключа идут первыми нужные потоки."""
+        if sort == "activity":
+            return (-self._thread_activity[thread_id], thread_id)
+        if sort == "size":
+            return (-len(self._threads[thread_id]), thread_id)
+        return (self.get_thread_subject(thread_id).casefold(), thread_id)
+
+    def list_threads(
+        self, sort: str = "activity", limit: int = 20, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Страница потоков с сортировкой и курсором (keyset-пагинация).
+
+        Курсор хранит ключ сортировки последнего потока страницы, поэтому
+        следующая страница продолжается с того же места, даже если между
+        запросами в ящик добавлялись письма. Для сортировки по активности
+        страница берётся из отсортированного индекса за O(log n + limit).
+
+        Args:
+            sort: "activity" (сначала недавно активные), "size" (сначала
+                самые большие) или "subject" (по теме, по алфавиту).
+            limit: Размер страницы.
+            cursor: Курсор из предыдущего вызова (None — первая страница).
+
+        Returns:
+            Список словарей {thread_id, subject, size, last_activity} и курсор
+            следующей страницы (None, если страница последняя).
+
+        Raises:
+            ValueError: Если сортировка неизвестна или курсор некорректен.
+        """
+        if sort not in _THREAD_SORTS:
+            raise ValueError(f"Неизвестная сортировка '{sort}'. Доступные: {', '.join(_THREAD_SORTS)}.")
+        after = _decode_cursor(cursor, sort) if cursor else None
+        if limit <= 0:
+            return [], None
+        if sort == "activity":
+            start = bisect_right(self._threads_by_activity, after) if after is not None else 0
+            keys = self._threads_by_activity[start:start + limit + 1]
+        else:
+            keys = (self._thread_sort_key(sort, thread_id) for thread_id in self._threads)
+            if after is not None:
+                keys = (key for key in keys if key > after)
+            keys = heapq.nsmallest(limit + 1, keys)
+        page, has_more = keys[:limit], len(keys) > limit
+        threads = [
+            {
+                "thread_id": thread_id,
+                "subject": self.get_thread_subject(thread_id),
+                "size": len(self._threads[thread_id]),
+                "last_activity": _EPOCH_UTC + timedelta(microseconds=self._thread_activity[thread_id]),
+            }
+            for _, thread_id in page
+        ]
+        next_cursor = _encode_cursor(sort, page[-1]) if has_more else None
+        return threads, next_cursor
+
     def get_thread_subject(self, thread_id: str) -> str:
         """Пример: взять тему первого письма в потоке как «главную»."""
-        email_ids = self._threads.get(thread_id, [])
+        email_ids = self._threads.get(thread_id)
         if not email_ids:
             return "[Empty Thread]"
-        first_email = self._emails[email_ids[0]]
+        first_email = self._emails[next(iter(email_ids))]
         return first_email.subject
 
-    def get_state_string(self) -> str:
-        """Возвращает строковое представление текущего состояния почтового ящика."""
+    def snapshot(self) -> bytes:
+        """Сохраняет письма, потоки и поисковый индекс в компактный бинарный снимок.
+
+        Поля писем пишутся колонками; время — в микросекундах от эпохи UTC
+        вместе со смещением часового пояса. Порядок писем и потоков сохраняется.
+        Индекс сохраняется готовым, чтобы восстановление не токенизировало письма.
+
+        Returns:
+            Байты снимка для `Mailbox.restore`.
+        """
+        emails = list(self._emails.values())
+        position = {email_id: i for i, email_id in enumerate(self._emails)}
+        writer = SnapshotWriter(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION)
+        writer.add_strings([e.email_id for e in emails])
+        writer.add_strings([e.thread_id for e in emails])
+        writer.add_strings([e.sender for e in emails])
+        writer.add_ints([len(e.recipients) for e in emails], "I")
+        writer.add_strings([r for e in emails for r in e.recipients])
+        writer.add_strings([e.subject for e in emails])
+        writer.add_strings([e.body for e in emails])
+        writer.add_ints([_timestamp_key(e.timestamp) for e in emails])
+        writer.add_ints([
+            _NAIVE_OFFSET if e.timestamp.tzinfo is None else e.timestamp.utcoffset() // timedelta(seconds=1)
+            for e in emails
+        ], "i")
+        writer.add_strings(list(self._threads))
+        writer.add_ints([len(ids) for ids in self._threads.values()], "I")
+        writer.add_ints([position[email_id] for ids in self._threads.values() for email_id in ids], "I")
+        self._search.write_snapshot(writer, position)
+        return writer.to_bytes()
+
+    @classmethod
+    def restore(cls, data: bytes) -> "Mailbox":
+        """Восстанавливает почтовый ящик из снимка `snapshot`.
+
+        Args:
+            data: Байты снимка.
+
+        Returns:
+            Новый почтовый ящик с теми же письмами и потоками.
+
+        Raises:
+            ValueError: Если данные не являются снимком почтового ящика.
+        """
+        with paused_gc():
+            return cls._restore(SnapshotReader(data, _SNAPSHOT_MAGIC, _SNAPSHOT_VERSION))
+
+    @classmethod
+    def _restore(cls, reader: SnapshotReader) -> "Mailbox":
+        """Читает колонки снимка и собирает объект."""
+        email_ids, thread_ids, senders = reader.read_strings(), reader.read_strings(), reader.read_strings()
+        recipient_counts, flat_recipients = reader.read_ints(), reader.read_strings()
+        recipients = [
+            flat_recipients[end - count:end] for count, end in zip(recipient_counts, accumulate(recipient_counts))
+        ]
+        subjects, bodies = reader.read_strings(), reader.read_strings()
+        moments, offsets = reader.read_ints(), reader.read_ints()
+
+        # Обычно все письма в UTC; остальные смещения исправляются поштучно.
+        timestamps = list(map(_EPOCH_UTC.__add__, map(timedelta, repeat(0), repeat(0), moments)))
+        zones: Dict[int, timezone] = {}
+        for i in [i for i, offset in enumerate(offsets) if offset]:
+            offset = offsets[i]
+            if offset == _NAIVE_OFFSET:
+                timestamps[i] = timestamps[i].replace(tzinfo=None)
+                continue
+            zone = zones.get(offset)
+            if zone is None:
+                zone = zones[offset] = timezone(timedelta(seconds=offset))
+            timestamps[i] = timestamps[i].astimezone(zone)
+
+        mailbox = cls()
+        emails = map(Email, senders, recipients, subjects, bodies, thread_ids, timestamps, email_ids)
+        mailbox._emails = dict(zip(email_ids, emails))
+
+        thread_keys, thread_sizes, positions = reader.read_strings(), reader.read_ints(), reader.read_ints()
+        thread_email_ids = list(map(email_ids.__getitem__, positions))
+        mailbox._threads = {
+            thread_id: dict.fromkeys(thread_email_ids[end - size:end])
+            for thread_id, size, end in zip(thread_keys, thread_sizes, accumulate(thread_sizes))
+        }
+        for email in mailbox._emails.values():
+            mailbox._index_addresses(email)
+        mailbox._search = SearchIndex.read_snapshot(reader, email_ids)
+        # Колонка времени уже содержит ключи индексов по времени.
+        mailbox._by_time = sorted(zip(moments, email_ids))
+        thread_moments = list(map(moments.__getitem__, positions))
+        mailbox._thread_activity = {
+            thread_id: max(thread_moments[end - size:end])
+            for thread_id, size, end in zip(thread_keys, thread_sizes, accumulate(thread_sizes))
+        }
+        mailbox._threads_by_activity = sorted((-key, thread_id) for thread_id, key in mailbox._thread_activity.items())
+        return mailbox
+
+    def get_state_string(self, limit: int = 20, sort: str = "activity") -> str:
+        """Возвращает строковое представление текущего состояния почтового ящика.
+
+        Args:
+            limit: Сколько цепочек показать (первая страница `list_threads`).
+            sort: Сортировка цепочек, см. `list_threads`.
+        """
         if not self._emails:
             return "Почтовый ящик пуст."
         output_lines = []        
-        threads = self.list_threads_with_subjects()
+        threads, _ = self.list_threads(sort, limit)
         if not threads:
             output_lines.append("  Нет активных цепочек писем.")
         else:
-            output_lines.append(f"Всего цепочек: {len(threads)}")
+            output_lines.append(f"Всего цепочек: {len(self._threads)}")
+            if len(threads) < len(self._threads):
+                output_lines.append(f"Показаны первые {len(threads)}.")
             output_lines.append("-" * 40)
             
             for i, thread_info in enumerate(threads):
@@ -164,17 +668,19 @@ def summarize_thread_content(full_text: str, gigachat: GigaChatSmolModel) -> str
     return response['answer']
 
 
-def summarize_thread(mailbox, thread_id: str, gigachat: GigaChatSmolModel) -> str:
+def summarize_thread(
+    mailbox, thread_id: str, gigachat: GigaChatSmolModel, max_tokens: int = _THREAD_PROMPT_TOKENS
+) -> str:
     """
     Возвращает суммаризацию переписки (thread).
+
+    Текст переписки сжимается до `max_tokens` (см. `tools.thread_budget.render_thread`).
     """
     emails = mailbox.get_thread_emails(thread_id)
     if not emails:
         return None
 
-    full_text = ""
-    for msg in emails:
-        full_text += f"\nFrom: {msg.sender}\nSubject: {msg.subject}\nBody:\n{msg.body}\n---\n"
+    full_text = render_thread(emails, max_tokens)
     summary = summarize_thread_content(full_text, gigachat)
     return summary
 
@@ -249,7 +755,8 @@ def auto_reply_to_last_email(
     thread_id: str,
     gigachat: GigaChatSmolModel,
     sender_address: str,
-    comment: Optional[str] = None
+    comment: Optional[str] = None,
+    max_tokens: int = _THREAD_PROMPT_TOKENS
 ) -> Tuple[str, str]:
     """
     Генерирует «автоответ» всем в последнем письме с учетом опционального комментария
@@ -261,6 +768,8 @@ def auto_reply_to_last_email(
         gigachat: Экземпляр модели GigaChat.
         sender_address: Адрес отправителя.
         comment: Опциональный комментарий/инструкция для генерации ответа.
+        max_tokens: Бюджет токенов на текст переписки; последнее письмо
+            дополнительно ограничивается четвертью бюджета.
 
     Returns:
         email_id: ID нового письма.
@@ -270,10 +779,10 @@ def auto_reply_to_last_email(
     if not emails:
         return f"No emails in thread '{thread_id}', cannot reply."
 
-    thread_string, emails_strings = mailbox.get_thread_emails_as_string(thread_id)
+    thread_string = render_thread(emails, max_tokens)
     reply_text = generate_auto_reply(
         thread_string=thread_string, 
-        last_email_string=emails_strings[-1],
+        last_email_string=truncate_to_tokens(str(emails[-1]), max_tokens // 4),
         gigachat=gigachat,
         sender_address=sender_address,
         comment=comment
@@ -307,6 +816,14 @@ def auto_reply_to_last_email(
     return new_email_id, reply_text
 
 
+def _email_line(email: Email) -> str:
+    """Однострочное описание письма для результатов поиска и выборок."""
+    return (
+        f"ID письма: {email.email_id}, ID треда: {email.thread_id}, От: {email.sender}, "
+        f"Тема: {email.subject}, Дата: {email.timestamp:%Y-%m-%d %H:%M}\n"
+    )
+
+
 class BaseMailTool(Tool):
     """Базовый класс для инструментов, взаимодействующих с Mailbox и GigaChat."""
     def __init__(self, mailbox: Mailbox, gigachat: GigaChatSmolModel):
@@ -323,18 +840,51 @@ class BaseMailTool(Tool):
 
 class ListThreadsTool(BaseMailTool):
     name = "list_email_threads"
-    description = "Выводит список всех доступных цепочек писем (тредов) с их темами."
-    inputs = {}
+    description = (
+        "Выводит страницу цепочек писем (тредов) с темами, числом писем и временем последней активности. "
+        "По умолчанию — самые недавно активные. Для следующей страницы передай курсор из предыдущего ответа."
+    )
+    inputs = {
+        "sort_by": {
+            "type": "string",
+            "description": "Сортировка: 'activity' (сначала недавние, по умолчанию), 'size' (сначала большие) или 'subject' (по теме).",
+            "nullable": True,
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Количество цепочек на странице (по умолчанию 20).",
+            "nullable": True,
+        },
+        "cursor": {
+            "type": "string",
+            "description": "Курсор следующей страницы из предыдущего ответа.",
+            "nullable": True,
+        },
+    }
     output_type = "string"
 
-    def forward(self) -> str:
-        """Выводит список всех цепочек писем.
+    def forward(self, sort_by: Optional[str] = "activity", limit: Optional[int] = 20, cursor: Optional[str] = None) -> str:
+        """Выводит страницу цепочек писем.
+
+        Args:
+            sort_by: Ключ сортировки ('activity', 'size', 'subject').
+            limit: Размер страницы.
+            cursor: Курсор следующей страницы.
 
         Returns:
-            str: Строка с списком цепочек писем.    
+            str: Строка со списком цепочек писем и курсором следующей страницы.
+
+        Raises:
+            ValueError: Если сортировка неизвестна или курсор некорректен.
         """
-        threads = self.mailbox.list_threads_with_subjects()
-        output = "".join([f"ID: {thread['thread_id']}, Тема: {thread['subject']}\n" for thread in threads])
+        threads, next_cursor = self.mailbox.list_threads(sort_by or "activity", limit or 20, cursor or None)
+        output = "".join([
+            f"ID: {thread['thread_id']}, Тема: {thread['subject']}, Писем: {thread['size']}, "
+            f"Последняя активность: {thread['last_activity']:%Y-%m-%d %H:%M} UTC\n"
+            for thread in threads
+        ])
+        if next_cursor:
+            output += f"Есть ещё цепочки. Курсор следующей страницы: {next_cursor}\n"
         return output
 
 
@@ -486,6 +1036,111 @@ class TranslateTool(BaseMailTool):
         return f"Тред '{thread_id}' успешно переведен на язык '{language}'. Текст перевода: {translated_text}"
 
 
+class SearchEmailsTool(BaseMailTool):
+    name = "search_emails"
+    description = (
+        "Ищет письма по ключевым словам в теме, тексте, адресах отправителя и получателей "
+        "и возвращает самые релевантные письма с ID их тредов. Используй вместо просмотра списка всех тредов."
+    )
+    inputs = {
+        "query": {
+            "type": "string",
+            "description": "Поисковый запрос (ключевые слова на русском или английском).",
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Максимальное количество результатов (по умолчанию 10).",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def forward(self, query: str, limit: Optional[int] = 10) -> str:
+        """Ищет письма по запросу.
+
+        Args:
+            query: Поисковый запрос.
+            limit: Максимальное количество результатов.
+
+        Returns:
+            str: Найденные письма (ID письма, ID треда, отправитель, тема), по убыванию релевантности.
+        """
+        results = self.mailbox.search_emails(query, limit or 10)
+        if not results:
+            return f"По запросу '{query}' ничего не найдено."
+        return "".join(_email_line(email) for email, _ in results)
+
+
+class FilterEmailsTool(BaseMailTool):
+    name = "filter_emails"
+    description = (
+        "Выбирает письма по отправителю, получателю и/или интервалу дат (например, «все письма от X за прошлую неделю»). "
+        "Возвращает письма от новых к старым с ID их тредов."
+    )
+    inputs = {
+        "sender": {
+            "type": "string",
+            "description": "Адрес отправителя.",
+            "nullable": True,
+        },
+        "recipient": {
+            "type": "string",
+            "description": "Адрес получателя.",
+            "nullable": True,
+        },
+        "since": {
+            "type": "string",
+            "description": "Начало интервала в формате ISO (например, '2025-03-10' или '2025-03-10T09:00'), включительно.",
+            "nullable": True,
+        },
+        "until": {
+            "type": "string",
+            "description": "Конец интервала в формате ISO, не включительно.",
+            "nullable": True,
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Максимальное количество писем (по умолчанию 20).",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def forward(
+        self,
+        sender: Optional[str] = None,
+        recipient: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> str:
+        """Выбирает письма по заданным условиям.
+
+        Args:
+            sender: Адрес отправителя.
+            recipient: Адрес получателя.
+            since: Начало интервала (ISO), включительно.
+            until: Конец интервала (ISO), не включительно.
+            limit: Максимальное количество писем.
+
+        Returns:
+            str: Найденные письма (ID письма, ID треда, отправитель, тема, дата), от новых к старым.
+
+        Raises:
+            ValueError: Если дата задана в неверном формате.
+        """
+        bounds = []
+        for value in (since, until):
+            try:
+                bounds.append(datetime.fromisoformat(value) if value else None)
+            except ValueError:
+                raise ValueError(f"Неверный формат даты '{value}'. Используйте ISO, например '2025-03-10T09:00'.")
+        emails = self.mailbox.find_emails(sender or None, recipient or None, bounds[0], bounds[1], limit or 20)
+        if not emails:
+            return "Писем с заданными условиями не найдено."
+        return "".join(_email_line(email) for email in emails)
+
+
 class MailToolset:
     """Предоставляет набор инструментов для взаимодействия с Mailbox и GigaChat."""
     def __init__(self, mailbox: Mailbox, gigachat: GigaChatSmolModel):
@@ -502,7 +1157,9 @@ class MailToolset:
             GetThreadDetailsTool(self.mailbox, self.gigachat),
             SummarizeThreadTool(self.mailbox, self.gigachat),
             GenerateReplyTool(self.mailbox, self.gigachat),
-            TranslateTool(self.mailbox, self.gigachat)
+            TranslateTool(self.mailbox, self.gigachat),
+            SearchEmailsTool(self.mailbox, self.gigachat),
+            FilterEmailsTool(self.mailbox, self.gigachat),
         ]
 
     def get_tools(self) -> List[Tool]:
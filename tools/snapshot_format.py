@@ -0,0 +1,157 @@
+"""Компактный бинарный формат снимков состояния (колоночная раскладка на struct/array).
+
+Снимок — это заголовок (магическая строка и версия формата) и следующие
+за ним секции. Каждая секция — одна колонка: массив целых чисел, массив
+строк или JSON-объект для небольших метаданных. Колонки читаются в том же
+порядке, в котором записывались, и восстанавливаются целиком без разбора
+отдельных записей, поэтому загрузка сводится к нескольким копированиям буферов.
+"""
+import gc
+import json
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Any, Iterator, List, Sequence
+
+_HEADER = struct.Struct("<4sH")
+_LENGTH = struct.Struct("<Q")
+_SEPARATOR = "\x00"
+_JOINED = b"J"
+_LENGTH_PREFIXED = b"L"
+
+
+def _to_bytes(values: array) -> bytes:
+    """Сериализует массив в little-endian."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    """Восстанавливает массив из little-endian байтов."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """Приостанавливает циклический сборщик мусора на время массового создания объектов.
+
+    Новые объекты снимка не образуют циклов, а сборщик, запускаемый каждые
+    несколько сотен аллокаций, многократно обходит растущую кучу.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class SnapshotWriter:
+    """Последовательно записывает колонки снимка."""
+
+    def __init__(self, magic: bytes, version: int = 1):
+        """Инициализирует запись.
+
+        Args:
+            magic: Четырёхбайтовая метка типа снимка.
+            version: Версия формата.
+        """
+        self._parts: List[bytes] = [_HEADER.pack(magic, version)]
+
+    def _add_block(self, data: bytes) -> None:
+        self._parts.append(_LENGTH.pack(len(data)))
+        self._parts.append(data)
+
+    def add_ints(self, values: Sequence[int], typecode: str = "q") -> None:
+        """Добавляет колонку целых чисел (typecode модуля array, по умолчанию int64)."""
+        self._parts.append(typecode.encode("ascii"))
+        self._add_block(_to_bytes(array(typecode, values)))
+
+    def add_strings(self, values: Sequence[str]) -> None:
+        """Добавляет колонку строк.
+
+        Обычно строки пишутся одним буфером через разделитель NUL и читаются
+        одним split. Если разделитель встречается в данных, вместо этого
+        пишутся длины строк в байтах UTF-8.
+        """
+        joined = _SEPARATOR.join(values)
+        if joined.count(_SEPARATOR) == max(len(values) - 1, 0):
+            self._parts.append(_JOINED)
+            self.add_ints([len(values)], "Q")
+            self._add_block(joined.encode("utf-8"))
+            return
+        encoded = [value.encode("utf-8") for value in values]
+        self._parts.append(_LENGTH_PREFIXED)
+        self.add_ints([len(item) for item in encoded], "I")
+        self._add_block(b"".join(encoded))
+
+    def add_json(self, value: Any) -> None:
+        """Добавляет небольшой JSON-объект (настройки, метаданные)."""
+        self._add_block(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def to_bytes(self) -> bytes:
+        """Возвращает готовый снимок."""
+        return b"".join(self._parts)
+
+
+class SnapshotReader:
+    """Читает колонки снимка в порядке их записи."""
+
+    def __init__(self, data: bytes, magic: bytes, version: int = 1):
+        """Проверяет заголовок снимка.
+
+        Args:
+            data: Байты снимка.
+            magic: Ожидаемая метка типа снимка.
+            version: Ожидаемая версия формата.
+
+        Raises:
+            ValueError: Если снимок другого типа или версии.
+        """
+        self._data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("Снимок повреждён или пуст.")
+        found_magic, found_version = _HEADER.unpack_from(self._data, 0)
+        if found_magic != magic or found_version != version:
+            raise ValueError(f"Неподдерживаемый снимок: {found_magic!r} версии {found_version}.")
+        self._offset = _HEADER.size
+
+    def _read_block(self) -> memoryview:
+        (length,) = _LENGTH.unpack_from(self._data, self._offset)
+        start = self._offset + _LENGTH.size
+        self._offset = start + length
+        if self._offset > len(self._data):
+            raise ValueError("Снимок повреждён: неожиданный конец данных.")
+        return self._data[start:self._offset]
+
+    def read_ints(self) -> array:
+        """Читает колонку целых чисел."""
+        typecode = chr(self._data[self._offset])
+        self._offset += 1
+        return _from_bytes(typecode, self._read_block())
+
+    def read_strings(self) -> List[str]:
+        """Читает колонку строк."""
+        mode = bytes(self._data[self._offset:self._offset + 1])
+        self._offset += 1
+        if mode == _JOINED:
+            (count,) = self.read_ints()
+            text = bytes(self._read_block()).decode("utf-8")
+            return text.split(_SEPARATOR) if count else []
+        lengths = self.read_ints()
+        buffer = bytes(self._read_block())
+        ends = list(accumulate(lengths))
+        return [buffer[end - length:end].decode("utf-8") for end, length in zip(ends, lengths)]
+
+    def read_json(self) -> Any:
+        """Читает JSON-объект."""
+        return json.loads(bytes(self._read_block()).decode("utf-8"))
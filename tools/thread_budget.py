@@ -0,0 +1,202 @@
+"""Отрисовка переписки для промптов LLM в пределах бюджета токенов.
+
+Перед отправкой в модель текст писем сжимается: убираются цитаты
+(строки с «>» и всё после заголовка пересылки/ответа), повторные
+подписи и дословные повторы недавних писем.
+Если переписка всё равно не помещается в бюджет, новые письма
+сохраняются целиком, первое письмо (завязка обсуждения) — в сокращённом
+виде, а более старые промежуточные письма усекаются или опускаются.
+
+Размер текста оценивается локально, без токенизатора модели: латиница —
+около четырёх символов на токен, кириллица — около трёх.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_ASCII_CHARS_PER_TOKEN = 4
+_NON_ASCII_CHARS_PER_TOKEN = 3
+
+_QUOTE_HEADER = re.compile(
+    r"^\s*(-{2,}\s*(original message|forwarded message|исходное сообщение|пересылаемое сообщение)\s*-*"
+    r"|on .+ wrote:|.+\s(написал|написала|пишет)\s*:)\s*$",
+    re.IGNORECASE,
+)
+_SIGNATURE_START = re.compile(
+    r"^\s*(--\s*|(с уважением|с наилучшими пожеланиями|всего доброго|всего хорошего|спасибо|благодарю"
+    r"|best regards|kind regards|regards|thanks|thank you|cheers)\s*[,.!]?)\s*$",
+    re.IGNORECASE,
+)
+_SIGNATURE_MAX_LINES = 6
+_REPEAT_LOOKBACK = 5  # со сколькими предыдущими письмами сравнивать на дословный повтор
+_REPEAT_MIN_CHARS = 80
+_FIRST_MESSAGE_SHARE = 8  # первому письму достаётся не больше 1/8 бюджета, если всё не помещается
+_MIN_BODY_TOKENS = 40  # усекать письмо меньше этого размера бессмысленно — оно опускается
+_TRUNCATED = " […]"
+_OMITTED_NOTE_TOKENS = 16  # запас на строку о пропущенных письмах
+
+
+def estimate_tokens(text: str) -> int:
+    """Быстро оценивает число токенов в тексте.
+
+    Не-ASCII символы (кириллица) занимают в UTF-8 по два байта, поэтому
+    их количество — это разница длины в байтах и в символах.
+    """
+    non_ascii = len(text.encode("utf-8")) - len(text)
+    return math.ceil((len(text) - non_ascii) / _ASCII_CHARS_PER_TOKEN + non_ascii / _NON_ASCII_CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Обрезает текст до оценки не более `max_tokens` токенов (по границе слова).
+
+    Args:
+        text: Исходный текст.
+        max_tokens: Бюджет токенов.
+
+    Returns:
+        Исходный текст, если он помещается, иначе его начало с пометкой «[…]».
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(_TRUNCATED)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    head = text[:low]
+    cut = head.rfind(" ")
+    if cut > low // 2:
+        head = head[:cut]
+    return head.rstrip() + _TRUNCATED
+
+
+def strip_quotes(body: str) -> str:
+    """Убирает из письма цитируемый текст.
+
+    Удаляются строки, начинающиеся с «>», и всё, что идёт после заголовка
+    цитаты («-----Original Message-----», «On … wrote:», «… написал:»).
+    """
+    lines = []
+    for line in body.split("\n"):
+        if _QUOTE_HEADER.match(line):
+            break
+        if not line.lstrip().startswith(">"):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def split_signature(body: str) -> Tuple[str, str]:
+    """Делит письмо на текст и подпись.
+
+    Подпись — хвост письма (не длиннее нескольких строк), который
+    начинается с разделителя «--» или формулы прощания («С уважением,»).
+
+    Returns:
+        (текст, подпись); подпись пустая, если не найдена.
+    """
+    lines = body.rstrip().split("\n")
+    for i in range(max(len(lines) - _SIGNATURE_MAX_LINES, 1), len(lines)):
+        if _SIGNATURE_START.match(lines[i]):
+            return "\n".join(lines[:i]).rstrip(), "\n".join(lines[i:]).strip()
+    return body.rstrip(), ""
+
+
+def compact_bodies(bodies: Sequence[str]) -> List[str]:
+    """Сжимает тексты писем переписки (в хронологическом порядке).
+
+    Убираются цитаты, повторные подписи (каждая уникальная подпись
+    остаётся только при первом появлении) и дословные повторы одного из
+    нескольких предыдущих писем.
+
+    Args:
+        bodies: Тексты писем по порядку.
+
+    Returns:
+        Сжатые тексты в том же порядке.
+    """
+    seen_signatures = set()
+    texts: List[str] = []  # тексты без подписей — с ними сравниваются следующие письма
+    compacted: List[str] = []
+    for body in bodies:
+        text, signature = split_signature(strip_quotes(body))
+        first = max(len(texts) - _REPEAT_LOOKBACK, 0)
+        for n, earlier in enumerate(texts[first:], first + 1):
+            if len(earlier) >= _REPEAT_MIN_CHARS and earlier in text:
+                text = text.replace(earlier, f"[повтор письма {n}]")
+        texts.append(text)
+        normalized = " ".join(signature.split())
+        if signature and normalized not in seen_signatures:
+            seen_signatures.add(normalized)
+            text = f"{text}\n\n{signature}" if text else signature
+        compacted.append(text or "[только цитата]")
+    return compacted
+
+
+def _default_format(email: Any, body: str) -> str:
+    return f"\nFrom: {email.sender}\nSubject: {email.subject}\nBody:\n{body}\n---\n"
+
+
+def render_thread(
+    emails: Sequence[Any],
+    max_tokens: int,
+    format_email: Optional[Callable[[Any, str], str]] = None,
+) -> str:
+    """Отрисовывает переписку так, чтобы оценка её размера не превышала `max_tokens`.
+
+    Args:
+        emails: Письма по порядку (объекты с полями sender, subject, body и т. п.).
+        max_tokens: Бюджет токенов на всю переписку.
+        format_email: Функция (письмо, сжатый текст) -> блок текста письма.
+            По умолчанию — «From / Subject / Body».
+
+    Returns:
+        Текст переписки. Пропущенные письма отмечаются строкой с их количеством.
+    """
+    format_email = format_email or _default_format
+    bodies = compact_bodies([email.body for email in emails])
+    blocks = [format_email(email, body) for email, body in zip(emails, bodies)]
+    costs = [estimate_tokens(block) for block in blocks]
+    if sum(costs) <= max_tokens:
+        return "".join(blocks)
+
+    def fit(i: int, budget: int) -> Optional[str]:
+        """Блок письма i, усечённый до бюджета, или None, если места слишком мало."""
+        if costs[i] <= budget:
+            return blocks[i]
+        room = budget - estimate_tokens(format_email(emails[i], ""))
+        if room < _MIN_BODY_TOKENS and i != len(emails) - 1:
+            return None
+        return format_email(emails[i], truncate_to_tokens(bodies[i], max(room, 0)))
+
+    kept: Dict[int, str] = {}
+    budget = max_tokens - _OMITTED_NOTE_TOKENS
+    if len(emails) > 1:
+        first = fit(0, budget // _FIRST_MESSAGE_SHARE)
+        if first is not None:
+            kept[0] = first
+            budget -= estimate_tokens(first)
+    for i in range(len(emails) - 1, 0, -1):
+        block = fit(i, budget)
+        if block is None:
+            break
+        kept[i] = block
+        budget -= estimate_tokens(block)
+        if block is not blocks[i]:
+            break
+    if len(emails) == 1:
+        kept[0] = fit(0, budget)
+
+    parts = []
+    omitted = 0
+    for i in range(len(emails)):
+        if i in kept:
+            if omitted:
+                parts.append(f"\n[… пропущено более ранних писем: {omitted} …]\n")
+                omitted = 0
+            parts.append(kept[i])
+        else:
+            omitted += 1
+    return "".join(parts)
@@ -311,9 +311,17 @@ class GradioUI:
             return self.gr.Markdown(value=f"**Ошибка при загрузке цепочки '{selected_choice}'.**", visible=True)
 
 
-    def _update_calendar_display(self) -> Dict[str, Any]:
-        """Updates the calendar state display."""
+    def _update_calendar_display(self, session_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Updates the calendar state display.
+
+        If the session has already shown the current calendar version, returns a no-op update.
+        """
         if self.calendar:
+            if session_state is not None:
+                if session_state.get("calendar_version") == self.calendar.version:
+                    return self.gr.Textbox()
+                session_state["calendar_version"] = self.calendar.version
             calendar_state = self.calendar.get_state_string()
             return self.gr.Textbox(value=calendar_state, visible=True)
         else:
@@ -464,7 +472,7 @@ class GradioUI:
             # --- Event Handlers ---
 
             # Define the function to run after agent interaction
-            def update_displays_after_interaction():
+            def update_displays_after_interaction(state):
                 outputs = {}
                 if self.mailbox:
                     radio_update_params, _, new_map = self._update_mailbox_display()
@@ -479,7 +487,7 @@ class GradioUI:
                     outputs[mailbox_thread_content_display] = gr.Markdown(visible=False)
 
                 if self.calendar:
-                     outputs[calendar_state_display] = self._update_calendar_display()
+                     outputs[calendar_state_display] = self._update_calendar_display(state)
                 else:
                     outputs[calendar_state_display] = gr.Textbox(visible=False) # Provide dummy update
 
@@ -527,7 +535,7 @@ class GradioUI:
                     current_radio_params, _, _ = self._update_mailbox_display() # Get current params for update
                     current_radio = gr.update(**current_radio_params) # Ensure it keeps its state
                 if self.calendar:
-                    current_calendar = self._update_calendar_display()
+                    current_calendar = self._update_calendar_display(state)
 
                 # Append user message as a ChatMessage object
                 user_message = gr.ChatMessage(role="user", content=prompt)
@@ -557,7 +565,7 @@ class GradioUI:
 
                 # 3. Update state displays (Mailbox, Calendar)
                 # This function now returns updates for: Radio, Map, Content, Calendar
-                radio_update, new_map, content_update, calendar_update = update_displays_after_interaction()
+                radio_update, new_map, content_update, calendar_update = update_displays_after_interaction(state)
 
                 # 4. Reset input controls
                 text_input_update, submit_btn_update = reset_inputs()